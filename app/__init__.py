@@ -1,22 +1,41 @@
 from flask import Flask
+from werkzeug.middleware.proxy_fix import ProxyFix
 from .config import DevConfig
 from .extensions import db, jwt
 from .routes.auth import auth_bp
+from .routes.bootstrap import bootstrap_bp
+from .routes.leaderboard import leaderboard_bp
 from .routes.sleep import sleep_bp
 from .routes.points import points_bp
 from .routes.rewards import rewards_bp
 from .routes.shop import shop_bp
+from .commands import register_commands
+from .services import ad_events, click_log, db_routing, instrumentation, json_provider, leaderboard, rate_limit, user_cache
 
 def create_app(config_class=DevConfig):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    if app.config.get('TRUSTED_PROXY_COUNT'):
+        hops = app.config['TRUSTED_PROXY_COUNT']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=hops, x_proto=hops)
+    json_provider.init_app(app)
+    db_routing.init_app(app)
     db.init_app(app)
     jwt.init_app(app)
+    user_cache.init_app(app, jwt)
+    instrumentation.init_app(app)
+    rate_limit.init_app(app)
+    click_log.init_app(app)
+    ad_events.init_app(app)
+    leaderboard.init_app(app)
+    register_commands(app)
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(sleep_bp, url_prefix='/api/sleep')
     app.register_blueprint(points_bp, url_prefix='/api/points')
     app.register_blueprint(rewards_bp, url_prefix='/api/rewards')
     app.register_blueprint(shop_bp, url_prefix='/api/shop')
+    app.register_blueprint(leaderboard_bp, url_prefix='/api/leaderboard')
+    app.register_blueprint(bootstrap_bp, url_prefix='/api')
 
     @app.get('/health')
     def health(): return {'status': 'ok'}
@@ -0,0 +1,17 @@
+from .ads import ads_cli
+from .leaderboard import leaderboard_cli
+from .partitions import partitions_cli
+from .points import points_cli
+from .rewards import rewards_cli
+from .shop import shop_cli
+from .sleep import sleep_cli
+
+
+def register_commands(app):
+    app.cli.add_command(ads_cli)
+    app.cli.add_command(leaderboard_cli)
+    app.cli.add_command(partitions_cli)
+    app.cli.add_command(points_cli)
+    app.cli.add_command(rewards_cli)
+    app.cli.add_command(shop_cli)
+    app.cli.add_command(sleep_cli)
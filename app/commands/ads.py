@@ -0,0 +1,25 @@
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from ..services.ad_events import compact_segments
+
+ads_cli = AppGroup('ads', help='광고 이벤트 파이프라인 관리.')
+
+
+@ads_cli.command('compact')
+@click.option('--batch-size', type=int, default=None, help='INSERT 한 번에 적재할 이벤트 수.')
+@click.option('--interval', type=float, default=0, help='0보다 크면 해당 초 간격으로 계속 실행한다.')
+def compact(batch_size, interval):
+    """봉인된 광고 이벤트 세그먼트를 DB에 적재하고 시간별 롤업을 갱신한다."""
+    config = current_app.config
+    batch_size = batch_size or config['AD_EVENT_COMPACT_BATCH']
+    stale_after = config['AD_EVENT_SEGMENT_MAX_AGE'] * 3
+    while True:
+        loaded = compact_segments(config['AD_EVENT_SEGMENT_DIR'], batch_size, stale_after)
+        click.echo(f'loaded {loaded} ad events')
+        if interval <= 0:
+            break
+        time.sleep(interval)
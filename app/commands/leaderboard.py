@@ -0,0 +1,16 @@
+import click
+from flask.cli import AppGroup
+
+from ..services.leaderboard import get_leaderboards
+
+leaderboard_cli = AppGroup('leaderboard', help='주간 리더보드 관리.')
+
+
+@leaderboard_cli.command('rebuild')
+def rebuild():
+    """원장과 수면 주간 집계로 리더보드를 다시 만들고 스냅샷을 쓴다. 배포 전 스냅샷을 미리 만들 때 쓴다."""
+    boards = get_leaderboards()
+    boards.rebuild()
+    for (metric, week), size in sorted(boards.sizes().items()):
+        click.echo(f'{metric} {week.isoformat()}: {size} users')
+    click.echo(f'snapshot written to {boards.snapshot_path}' if boards.snapshot_path else 'snapshot disabled')
@@ -0,0 +1,65 @@
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from ..services import partitions
+
+partitions_cli = AppGroup('partitions', help='로그 테이블 월 단위 파티션 관리. (PostgreSQL 전용)')
+
+
+def _require_postgres() -> bool:
+    if partitions.is_supported():
+        return True
+    click.echo('파티셔닝은 PostgreSQL에서만 지원합니다. 건너뜁니다.')
+    return False
+
+
+@partitions_cli.command('convert')
+@click.argument('table', type=click.Choice(sorted(partitions.PARTITIONED_MODELS)))
+@click.option('--batch-size', type=int, default=50000, show_default=True, help='한 번에 옮길 id 구간 크기.')
+def convert(table, batch_size):
+    """기존 테이블을 created_at 월 단위 파티션 테이블로 바꾼다. (1회성)"""
+    if not _require_postgres():
+        return
+    try:
+        copied = partitions.convert_table(
+            table, current_app.config['PARTITION_MONTHS_AHEAD'], batch_size, echo=click.echo,
+        )
+    except partitions.PartitionError as exc:
+        raise click.ClickException(str(exc)) from exc
+    click.echo(f'{table}: partitioned, {copied} rows copied')
+
+
+@partitions_cli.command('maintain')
+@click.option('--dry-run', is_flag=True, help='만들거나 아카이브할 파티션만 출력한다.')
+@click.option('--interval', type=float, default=0, help='0보다 크면 해당 초 간격으로 계속 실행한다.')
+def maintain(dry_run, interval):
+    """다가올 달의 파티션을 만들고, 보관 기간이 지난 파티션을 아카이브 후 분리한다."""
+    if not _require_postgres():
+        return
+    config = current_app.config
+    while True:
+        for table in sorted(partitions.PARTITIONED_MODELS):
+            if not partitions.is_partitioned(table):
+                click.echo(f'{table}: not partitioned, skipped')
+                continue
+            if not dry_run:
+                created = partitions.ensure_partitions(table, config['PARTITION_MONTHS_AHEAD'])
+                if created:
+                    click.echo(f"{table}: created {', '.join(created)}")
+
+            retain = config['PARTITION_RETAIN_MONTHS'].get(table, 0)
+            if retain <= 0:
+                continue
+            for month in partitions.expired_partitions(table, retain):
+                name = partitions.partition_name(table, month)
+                if dry_run:
+                    click.echo(f'{table}: would archive {name}')
+                    continue
+                count = partitions.archive_partition(table, month, config['PARTITION_ARCHIVE_DIR'])
+                click.echo(f'{table}: archived {count} rows from {name}')
+        if interval <= 0:
+            break
+        time.sleep(interval)
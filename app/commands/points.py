@@ -0,0 +1,113 @@
+from datetime import date
+
+import click
+from flask.cli import AppGroup
+
+from ..extensions import db
+from ..models.points import UserDailyRewardCounter, UserPointLog
+from ..models.user import User
+from ..services import ledger
+from ..services.sql import dialect_insert
+
+points_cli = AppGroup('points', help='포인트 원장 관리.')
+
+
+@points_cli.command('backfill-daily-counters')
+@click.option('--type', 'reward_type', default='sleep_reward', show_default=True)
+@click.option('--batch-size', type=int, default=1000, show_default=True)
+def backfill_daily_counters(reward_type, batch_size):
+    """user_point_logs 합계로 user_daily_reward_counters를 채운다."""
+    day_expr = db.func.date(UserPointLog.created_at)
+    rows = (
+        db.session.query(
+            UserPointLog.user_id,
+            day_expr.label('day'),
+            db.func.sum(UserPointLog.change).label('points'),
+        )
+        .filter(UserPointLog.type == reward_type)
+        .group_by(UserPointLog.user_id, day_expr)
+        .execution_options(stream_results=True)
+        .yield_per(batch_size)
+    )
+
+    table = UserDailyRewardCounter.__table__
+    insert = dialect_insert(table)
+    # 백필 중에 들어온 지급분을 덮어쓰지 않도록 더 큰 값을 유지한다.
+    stmt = insert.on_conflict_do_update(
+        index_elements=['user_id', 'day', 'type'],
+        set_={
+            'points': db.case(
+                (insert.excluded.points > table.c.points, insert.excluded.points),
+                else_=table.c.points,
+            ),
+        },
+    )
+
+    # 서버 측 커서는 커밋하면 닫히므로 전체를 한 트랜잭션으로 쓰고 마지막에 커밋한다.
+    total = 0
+    batch = []
+    for user_id, day, points in rows:
+        if isinstance(day, str):  # SQLite의 date()는 문자열을 돌려준다.
+            day = date.fromisoformat(day)
+        batch.append({
+            'user_id': user_id,
+            'day': day,
+            'type': reward_type,
+            'points': int(points or 0),
+            'last_credit': 0,
+        })
+        if len(batch) >= batch_size:
+            db.session.execute(stmt, batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(stmt, batch)
+        total += len(batch)
+    db.session.commit()
+    click.echo(f'backfilled {total} daily counters')
+
+
+@points_cli.command('reconcile')
+@click.option('--batch-size', type=int, default=1000, show_default=True, help='한 번에 비교할 사용자 수.')
+@click.option('--fix', is_flag=True, help='차이가 난 사용자의 total_points를 원장 합계로 맞춘다.')
+def reconcile(batch_size, fix):
+    """users.total_points와 user_point_logs 합계를 비교해 차이를 보고(또는 수정)한다.
+
+    사용자 id는 서버 측 커서로 흘려 읽고, 비교는 배치마다 한 문장으로 한다. 테이블 잠금은 잡지 않으며,
+    수정은 사용자 행 단위 조건부 UPDATE라 비교 이후 잔액이 바뀐 사용자는 건너뛴다.
+    """
+    user_ids = (
+        db.session.query(User.id)
+        .order_by(User.id)
+        .execution_options(stream_results=True)
+        .yield_per(batch_size)
+    )
+
+    # 서버 측 커서는 커밋하면 닫히므로 차이만 모아 두고 스트림이 끝난 뒤 수정한다.
+    checked = 0
+    drifts = []
+    batch = []
+    for (user_id,) in user_ids:
+        batch.append(user_id)
+        if len(batch) >= batch_size:
+            drifts.extend(ledger.find_drift(batch))
+            checked += len(batch)
+            batch = []
+    if batch:
+        drifts.extend(ledger.find_drift(batch))
+        checked += len(batch)
+    db.session.rollback()
+
+    for user_id, total_points, ledger_sum in drifts:
+        click.echo(f'user {user_id}: total_points={total_points} ledger={ledger_sum} diff={(total_points or 0) - ledger_sum}')
+
+    fixed = skipped = 0
+    if fix:
+        for start in range(0, len(drifts), batch_size):
+            for user_id, total_points, _ in drifts[start:start + batch_size]:
+                if ledger.fix_drift(user_id, total_points):
+                    fixed += 1
+                else:
+                    skipped += 1
+            db.session.commit()
+    click.echo(f'checked {checked} users, {len(drifts)} drifted, {fixed} fixed, {skipped} skipped')
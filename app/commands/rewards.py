@@ -0,0 +1,23 @@
+import click
+from flask.cli import AppGroup
+
+from ..extensions import db
+from ..services import rewards
+
+rewards_cli = AppGroup('rewards', help='리워드 카탈로그 관리.')
+
+
+@rewards_cli.command('create')
+@click.option('--title', required=True)
+@click.option('--cost', type=int, required=True, help='교환에 필요한 포인트.')
+@click.option('--stock', type=int, default=None, help='총 재고. 생략하면 무제한.')
+@click.option('--shards', type=int, default=1, show_default=True, help='재고를 나눌 샤드 수. 인기 리워드는 크게 잡는다.')
+@click.option('--description', default=None)
+@click.option('--image-url', default=None)
+def create(title, cost, stock, shards, description, image_url):
+    """리워드를 만들고 재고를 샤드에 나눠 담는다."""
+    reward = rewards.create_reward(
+        title, cost, stock=stock, shards=shards, description=description, image_url=image_url,
+    )
+    db.session.commit()
+    click.echo(f'created reward {reward.id} ({title}), stock={stock}, shards={reward.stock_shards}')
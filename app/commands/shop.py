@@ -0,0 +1,48 @@
+import time
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from ..services import catalog_import, click_rollup
+
+shop_cli = AppGroup('shop', help='쇼핑 카탈로그/클릭 집계 관리.')
+
+
+@shop_cli.command('rollup-clicks')
+@click.option('--batch-size', type=int, default=None, help='한 트랜잭션에서 집계할 클릭 수.')
+@click.option('--interval', type=float, default=0, help='0보다 크면 해당 초 간격으로 계속 실행한다.')
+def rollup_clicks(batch_size, interval):
+    """워터마크 이후의 클릭을 시간별 집계에 더하고 상품 인기 점수를 갱신한다."""
+    config = current_app.config
+    batch_size = batch_size or config['CLICK_ROLLUP_BATCH']
+    while True:
+        rolled = click_rollup.rollup(
+            batch_size, config['CLICK_ROLLUP_LAG_SECONDS'], config['CLICK_ROLLUP_LOOKBACK_HOURS'],
+        )
+        updated = click_rollup.refresh_popularity(config['POPULARITY_WINDOW_HOURS'])
+        click.echo(f'rolled up {rolled} clicks, updated popularity of {updated} products')
+        if interval <= 0:
+            break
+        time.sleep(interval)
+
+
+@shop_cli.command('import-feed')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']), default=None, help='기본값은 확장자로 판단한다.')
+@click.option('--source', default='coupang', show_default=True, help='상품 출처(source) 값.')
+@click.option('--batch-size', type=int, default=1000, show_default=True, help='INSERT 한 번에 upsert할 행 수.')
+@click.option('--deactivate-missing/--keep-missing', default=True, help='피드에 없는 같은 출처 상품을 비활성화한다.')
+def import_feed(path, fmt, source, batch_size, deactivate_missing):
+    """상품 피드(CSV/JSON Lines)를 (source, external_id) 기준으로 upsert한다."""
+    def on_error(line, exc):
+        click.echo(f'skip line {line}: {exc}', err=True)
+
+    stats = catalog_import.import_feed(
+        catalog_import.read_feed(path, fmt), source,
+        batch_size=batch_size, deactivate_missing=deactivate_missing, on_error=on_error,
+    )
+    click.echo(
+        f"imported {stats['processed']} products, skipped {stats['skipped']}, "
+        f"deactivated {stats['deactivated']}"
+    )
@@ -0,0 +1,14 @@
+import click
+from flask.cli import AppGroup
+
+from ..services import sleep_stats
+
+sleep_cli = AppGroup('sleep', help='수면 기록 관리.')
+
+
+@sleep_cli.command('rebuild-stats')
+@click.option('--batch-size', type=int, default=1000, show_default=True, help='한 번에 처리할 사용자 id 구간 크기.')
+def rebuild_stats(batch_size):
+    """sleep_logs 전체에서 일간/주간/기분 롤업을 다시 계산한다."""
+    batches = sleep_stats.rebuild(batch_size)
+    click.echo(f'rebuilt sleep stats in {batches} batches')
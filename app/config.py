@@ -11,11 +11,85 @@ class Config:
     SQLALCHEMY_DATABASE_URI = (
         f"postgresql://{DB_USER}:{quote_plus(DB_PASSWORD)}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     )
+    # 설정하면 @read_only 뷰의 조회를 이 복제본으로 보낸다.
+    REPLICA_DATABASE_URL = os.getenv('REPLICA_DATABASE_URL')
+    REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', '5'))
+    REPLICA_HEALTH_INTERVAL = float(os.getenv('REPLICA_HEALTH_INTERVAL', '5'))
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    JSON_PROVIDER = os.getenv('JSON_PROVIDER', 'auto')  # auto, orjson, default
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', '200'))
+    SLOW_QUERY_MAX_PARAM_CHARS = int(os.getenv('SLOW_QUERY_MAX_PARAM_CHARS', '1000'))
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') == '1'
     SECRET_KEY = os.getenv('SECRET_KEY', 'change')
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'change2')
     GOOGLE_CLIENT_ID = os.getenv('GOOGLE_CLIENT_ID')
+    GOOGLE_CERTS_URL = os.getenv('GOOGLE_CERTS_URL', 'https://www.googleapis.com/oauth2/v1/certs')
+    KAKAO_USER_ME_URL = os.getenv('KAKAO_USER_ME_URL', 'https://kapi.kakao.com/v2/user/me')
+    SOCIAL_HTTP_TIMEOUT = float(os.getenv('SOCIAL_HTTP_TIMEOUT', '5'))
+    SOCIAL_HTTP_POOL_SIZE = int(os.getenv('SOCIAL_HTTP_POOL_SIZE', '20'))
+    SOCIAL_TOKEN_CACHE_SIZE = int(os.getenv('SOCIAL_TOKEN_CACHE_SIZE', '10000'))
+    SOCIAL_TOKEN_CACHE_TTL = int(os.getenv('SOCIAL_TOKEN_CACHE_TTL', '60'))
+    CATALOG_CACHE_MAXSIZE = int(os.getenv('CATALOG_CACHE_MAXSIZE', '2048'))
+    CATALOG_CACHE_TTL = int(os.getenv('CATALOG_CACHE_TTL', '300'))
+    CATALOG_VERSION_TTL = int(os.getenv('CATALOG_VERSION_TTL', '5'))
+    SHOP_SEARCH_BACKEND = os.getenv('SHOP_SEARCH_BACKEND', 'auto')  # auto, postgres, memory
+    SHOP_SEARCH_REFRESH_SECONDS = int(os.getenv('SHOP_SEARCH_REFRESH_SECONDS', '30'))
+    CLICK_ROLLUP_BATCH = int(os.getenv('CLICK_ROLLUP_BATCH', '5000'))
+    # 클릭 id에 빈틈이 있으면 늦게 커밋될 행을 이 시간(초)만큼 기다린 뒤 건너뛴다.
+    CLICK_ROLLUP_LAG_SECONDS = int(os.getenv('CLICK_ROLLUP_LAG_SECONDS', '30'))
+    # 집계는 워터마크가 마지막으로 움직인 시각보다 이만큼(시간) 이전에 만들어진 클릭만 읽는다. (파티션 pruning)
+    CLICK_ROLLUP_LOOKBACK_HOURS = int(os.getenv('CLICK_ROLLUP_LOOKBACK_HOURS', '48'))
+    POPULARITY_WINDOW_HOURS = int(os.getenv('POPULARITY_WINDOW_HOURS', '168'))
+    SHOP_TOP_CACHE_TTL = int(os.getenv('SHOP_TOP_CACHE_TTL', '60'))
+    USER_CACHE_SIZE = int(os.getenv('USER_CACHE_SIZE', '50000'))
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '60'))  # 프로필 필드만 캐시한다
+    # last_login_at은 이 간격(초) 단위로만 갱신한다. 같은 구간 안의 재로그인은 쓰기 없이 끝난다.
+    LAST_LOGIN_RESOLUTION_SECONDS = int(os.getenv('LAST_LOGIN_RESOLUTION_SECONDS', '900'))
+    # 앞단 프록시(로드 밸런서) 수. 0보다 크면 X-Forwarded-For/Proto의 그만큼 뒤 값을 클라이언트로 믿는다.
+    # 설정하지 않으면 비로그인 요청의 IP 한도가 프록시 IP 하나로 묶인다.
+    TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', '0'))
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', '1') == '1'
+    RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'local')  # local 또는 'pkg.module:Class'
+    RATE_LIMIT_MAX_KEYS = int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000'))
+    # 엔드포인트별 사용자(없으면 IP) 한도. '횟수/second|minute|hour', 버킷 크기는 횟수와 같다.
+    RATE_LIMITS = {
+        'shop.click_product': os.getenv('RATE_LIMIT_SHOP_CLICK', '60/minute'),
+        'sleep.ad_impression': os.getenv('RATE_LIMIT_AD_IMPRESSION', '120/minute'),
+        'sleep.ad_click': os.getenv('RATE_LIMIT_AD_CLICK', '60/minute'),
+        'sleep.create_session': os.getenv('RATE_LIMIT_CREATE_SESSION', '10/minute'),
+    }
+    # RATE_LIMITS 엔드포인트의 프로세스당 동시 처리 상한(0이면 끔). DB 풀 크기에 맞춘다.
+    ADMISSION_MAX_INFLIGHT = int(os.getenv('ADMISSION_MAX_INFLIGHT', '16'))
+    ADMISSION_WAIT_SECONDS = float(os.getenv('ADMISSION_WAIT_SECONDS', '0.05'))
+    ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '1'))
+    BOOTSTRAP_PARALLEL = os.getenv('BOOTSTRAP_PARALLEL', 'auto')  # auto, 1, 0
+    BOOTSTRAP_WORKERS = int(os.getenv('BOOTSTRAP_WORKERS', '8'))
+    LEADERBOARD_WEEKS = int(os.getenv('LEADERBOARD_WEEKS', '2'))  # 이번 주 포함 보관할 주 수
+    LEADERBOARD_RESYNC_SECONDS = int(os.getenv('LEADERBOARD_RESYNC_SECONDS', '300'))
+    LEADERBOARD_SNAPSHOT_SECONDS = int(os.getenv('LEADERBOARD_SNAPSHOT_SECONDS', '60'))
+    LEADERBOARD_SNAPSHOT_PATH = os.getenv('LEADERBOARD_SNAPSHOT_PATH', os.path.join('var', 'leaderboard', 'snapshot.json.gz'))
+    CLICK_LOG_ASYNC = os.getenv('CLICK_LOG_ASYNC', '1') == '1'
+    CLICK_LOG_BATCH_SIZE = int(os.getenv('CLICK_LOG_BATCH_SIZE', '500'))
+    CLICK_LOG_FLUSH_INTERVAL = float(os.getenv('CLICK_LOG_FLUSH_INTERVAL', '1.0'))
+    CLICK_LOG_QUEUE_SIZE = int(os.getenv('CLICK_LOG_QUEUE_SIZE', '10000'))
+    CLICK_LOG_ENQUEUE_TIMEOUT = float(os.getenv('CLICK_LOG_ENQUEUE_TIMEOUT', '0.05'))
+    CLICK_LOG_SPOOL_DIR = os.getenv('CLICK_LOG_SPOOL_DIR', os.path.join('var', 'spool', 'clicks'))
+    CLICK_LOG_REPLAY_STALE_SECONDS = int(os.getenv('CLICK_LOG_REPLAY_STALE_SECONDS', '600'))
+    AD_EVENT_SEGMENT_DIR = os.getenv('AD_EVENT_SEGMENT_DIR', os.path.join('var', 'ad_events'))
+    AD_EVENT_FLUSH_INTERVAL = float(os.getenv('AD_EVENT_FLUSH_INTERVAL', '0.5'))
+    AD_EVENT_BUFFER_MAX = int(os.getenv('AD_EVENT_BUFFER_MAX', '5000'))
+    AD_EVENT_SEGMENT_MAX_BYTES = int(os.getenv('AD_EVENT_SEGMENT_MAX_BYTES', str(64 * 1024 * 1024)))
+    AD_EVENT_SEGMENT_MAX_AGE = int(os.getenv('AD_EVENT_SEGMENT_MAX_AGE', '60'))
+    AD_EVENT_COMPACT_BATCH = int(os.getenv('AD_EVENT_COMPACT_BATCH', '5000'))
+    PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', '3'))
+    # 테이블별 보관 개월 수(이번 달 포함). 0이면 아카이브하지 않는다.
+    PARTITION_RETAIN_MONTHS = {
+        'shop_click_logs': int(os.getenv('CLICK_LOG_RETAIN_MONTHS', '6')),
+        'user_point_logs': int(os.getenv('POINT_LOG_RETAIN_MONTHS', '0')),
+    }
+    PARTITION_ARCHIVE_DIR = os.getenv('PARTITION_ARCHIVE_DIR', os.path.join('var', 'archive'))
 
 
 class DevConfig(Config):
     DEBUG = True
+    INSTRUMENTATION_HEADERS = True
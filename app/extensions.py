@@ -1,4 +1,5 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
-db = SQLAlchemy()
+from .services.db_routing import RoutingSession
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 jwt = JWTManager()
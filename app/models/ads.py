@@ -0,0 +1,31 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class AdEvent(db.Model):
+    __tablename__ = 'ad_events'
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    event_id = db.Column(db.String(32), nullable=False)  # 수집 시 발급, 재적재 중복 방지용
+    event_type = db.Column(db.String(20), nullable=False)  # impression, click
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    placement = db.Column(db.String(50))
+    ad_unit_id = db.Column(db.String(100))
+    network = db.Column(db.String(50))
+    payload = db.Column(db.JSON)
+    user_agent = db.Column(db.Text)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('event_id', name='uq_ad_events_event_id'),
+        db.Index('idx_ad_events_placement_created', 'placement', 'created_at'),
+    )
+
+
+class AdEventHourly(db.Model):
+    __tablename__ = 'ad_event_hourly'
+
+    hour = db.Column(db.DateTime, primary_key=True)
+    placement = db.Column(db.String(50), primary_key=True, default='')
+    event_type = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
@@ -0,0 +1,12 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class JobWatermark(db.Model):
+    """증분 배치 작업이 마지막으로 처리한 위치(high-water mark)."""
+
+    __tablename__ = 'job_watermarks'
+
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.BigInteger, default=0, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -11,4 +11,20 @@ class UserPointLog(db.Model):
     balance_after = db.Column(db.Integer, nullable=False)
     type = db.Column(db.String(50), nullable=False)
     sleep_log_id = db.Column(db.Integer, db.ForeignKey('sleep_logs.id'))
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)  # 월 파티션 키
+
+    __table_args__ = (
+        db.Index('idx_user_point_logs_user_created', 'user_id', 'created_at', 'id'),
+    )
+
+
+class UserDailyRewardCounter(db.Model):
+    """사용자·일자·리워드 종류별 지급 합계. 일일 한도 검사를 단일 행 갱신으로 처리한다."""
+    __tablename__ = 'user_daily_reward_counters'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)  # UTC 기준
+    type = db.Column(db.String(50), primary_key=True)
+    points = db.Column(db.Integer, default=0, nullable=False)
+    last_credit = db.Column(db.Integer, default=0, nullable=False)  # 마지막 갱신에서 실제 지급된 양
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
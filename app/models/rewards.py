@@ -0,0 +1,53 @@
+from datetime import datetime
+from ..extensions import db
+
+
+class Reward(db.Model):
+    __tablename__ = 'rewards'
+
+    id = db.Column(db.Integer, primary_key=True)
+    title = db.Column(db.String(255), nullable=False)
+    description = db.Column(db.Text)
+    image_url = db.Column(db.String(500))
+    cost = db.Column(db.Integer, nullable=False)  # 교환에 필요한 포인트
+    stock_total = db.Column(db.Integer)  # NULL이면 재고 제한 없음
+    stock_shards = db.Column(db.Integer, default=1, nullable=False)
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.CheckConstraint('cost > 0', name='ck_rewards_cost_positive'),
+        db.Index('idx_rewards_is_active', 'is_active'),
+    )
+
+
+class RewardStockShard(db.Model):
+    """리워드 재고를 나눠 담은 행. 교환은 임의의 샤드 하나만 잠그고 차감한다."""
+    __tablename__ = 'reward_stock_shards'
+
+    reward_id = db.Column(db.Integer, db.ForeignKey('rewards.id'), primary_key=True)
+    shard = db.Column(db.Integer, primary_key=True)
+    remaining = db.Column(db.Integer, nullable=False)
+
+    __table_args__ = (
+        db.CheckConstraint('remaining >= 0', name='ck_reward_stock_shards_remaining'),
+    )
+
+
+class RewardRedemption(db.Model):
+    __tablename__ = 'reward_redemptions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    reward_id = db.Column(db.Integer, db.ForeignKey('rewards.id'), nullable=False)
+    idempotency_key = db.Column(db.String(64), nullable=False)  # 클라이언트 재시도 중복 방지
+    cost = db.Column(db.Integer, nullable=False)
+    shard = db.Column(db.Integer)
+    balance_after = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'idempotency_key', name='uq_reward_redemptions_user_key'),
+        db.Index('idx_reward_redemptions_user_created', 'user_id', 'created_at', 'id'),
+    )
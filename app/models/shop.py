@@ -2,6 +2,13 @@ from datetime import datetime
 from ..extensions import db
 
 
+def _trigram_index(name: str, column: str):
+    """상품 검색용 pg_trgm GIN 인덱스. Postgres에서만 만든다."""
+    return db.Index(
+        name, column, postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+    ).ddl_if(dialect='postgresql')
+
+
 class ShopProduct(db.Model):
     __tablename__ = 'shop_products'
 
@@ -19,22 +26,54 @@ class ShopProduct(db.Model):
     thumb_url = db.Column(db.String(500))
     icon_bg_color = db.Column(db.String(20))
     source = db.Column(db.String(50), default='coupang', nullable=False)
+    external_id = db.Column(db.String(100))  # 피드 상품 id. 수동 등록 상품은 NULL
     partners_url = db.Column(db.Text, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
     is_active = db.Column(db.Boolean, default=True, nullable=False)
+    # 최근 POPULARITY_WINDOW_HOURS 동안의 클릭 수. shop rollup-clicks가 갱신한다.
+    popularity_score = db.Column(db.Integer, default=0, server_default='0', nullable=False)
 
     __table_args__ = (
+        db.UniqueConstraint('source', 'external_id', name='uq_shop_products_source_external_id'),
         db.Index('idx_shop_products_category', 'category'),
         db.Index('idx_shop_products_is_recommended', 'is_recommended'),
         db.Index('idx_shop_products_is_active', 'is_active'),
+        # 카탈로그 버전(max(updated_at)) 조회용
+        db.Index('idx_shop_products_updated_at', 'updated_at'),
+        # 목록 정렬(is_recommended DESC, created_at DESC, id DESC)과 같은 순서의 키셋 인덱스
+        db.Index(
+            'idx_shop_products_listing',
+            'is_active', 'category', 'is_recommended', 'created_at', 'id',
+        ),
+        db.Index(
+            'idx_shop_products_listing_all',
+            'is_active', 'is_recommended', 'created_at', 'id',
+        ),
+        # sort=popular 목록용 키셋 인덱스
+        db.Index(
+            'idx_shop_products_popular',
+            'is_active', 'category', 'popularity_score', 'id',
+        ),
+        db.Index('idx_shop_products_popular_all', 'is_active', 'popularity_score', 'id'),
+        _trigram_index('idx_shop_products_title_trgm', 'title'),
+        _trigram_index('idx_shop_products_subtitle_trgm', 'subtitle'),
+        _trigram_index('idx_shop_products_tag_trgm', 'tag'),
     )
 
 
+db.event.listen(
+    ShopProduct.__table__,
+    'before_create',
+    db.DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'),
+)
+
+
 class ShopClickLog(db.Model):
     __tablename__ = 'shop_click_logs'
 
-    id = db.Column(db.BigInteger, primary_key=True)
+    # SQLite는 INTEGER PRIMARY KEY만 자동 증가하므로 로컬 DB에서는 Integer로 만든다.
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     product_id = db.Column(db.Integer, db.ForeignKey('shop_products.id'), nullable=False)
     source = db.Column(db.String(50))
@@ -43,3 +82,18 @@ class ShopClickLog(db.Model):
     out_url = db.Column(db.Text)
 
     product = db.relationship('ShopProduct', backref=db.backref('click_logs', lazy='dynamic'))
+
+
+class ShopClickHourly(db.Model):
+    """shop_click_logs의 시간별/상품별/유입 경로별 집계. shop rollup-clicks가 증분으로 채운다."""
+
+    __tablename__ = 'shop_click_hourly'
+
+    hour = db.Column(db.DateTime, primary_key=True)
+    product_id = db.Column(db.Integer, db.ForeignKey('shop_products.id'), primary_key=True)
+    source = db.Column(db.String(50), primary_key=True, default='')
+    count = db.Column(db.Integer, default=0, nullable=False)
+
+    __table_args__ = (
+        db.Index('idx_shop_click_hourly_product_hour', 'product_id', 'hour'),
+    )
@@ -17,7 +17,49 @@ class SleepLog(db.Model):
     white_noise_volume = db.Column(db.Integer)
     status = db.Column(db.String(20), default='running', nullable=False)  # running, ended
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    client_session_id = db.Column(db.String(64))  # 오프라인 동기화 멱등 키
 
     __table_args__ = (
         db.Index('idx_sleep_logs_user_status', 'user_id', 'status'),
+        db.UniqueConstraint('user_id', 'client_session_id', name='uq_sleep_logs_user_client_session'),
+        # 사용자당 진행 중 세션은 하나뿐: 조회는 인덱스 한 번, 동시 생성은 DB가 막는다.
+        db.Index(
+            'uq_sleep_logs_user_running', 'user_id',
+            unique=True,
+            postgresql_where=db.text("status = 'running'"),
+            sqlite_where=db.text("status = 'running'"),
+        ),
     )
+
+
+class SleepDailyStat(db.Model):
+    """사용자별 일간 수면 집계. 날짜는 started_at의 UTC 날짜 기준."""
+    __tablename__ = 'sleep_daily_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    session_count = db.Column(db.Integer, default=0, nullable=False)
+    total_minutes = db.Column(db.Integer, default=0, nullable=False)
+    score_sum = db.Column(db.Integer, default=0, nullable=False)
+    score_count = db.Column(db.Integer, default=0, nullable=False)
+
+
+class SleepWeeklyStat(db.Model):
+    """사용자별 주간(월요일 시작) 수면 집계."""
+    __tablename__ = 'sleep_weekly_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    week_start = db.Column(db.Date, primary_key=True)
+    session_count = db.Column(db.Integer, default=0, nullable=False)
+    total_minutes = db.Column(db.Integer, default=0, nullable=False)
+    score_sum = db.Column(db.Integer, default=0, nullable=False)
+    score_count = db.Column(db.Integer, default=0, nullable=False)
+
+
+class SleepMoodDailyStat(db.Model):
+    __tablename__ = 'sleep_mood_daily_stats'
+
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    mood = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, default=0, nullable=False)
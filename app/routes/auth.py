@@ -1,12 +1,22 @@
-from datetime import datetime
-from flask import Blueprint, request
+from datetime import datetime, timezone
+from flask import Blueprint, current_app, request
 from flask_jwt_extended import create_access_token
 from ..extensions import db
 from ..models.user import User
+from ..services import user_cache
 from ..services.social_auth import SocialAuthError, verify_social_token
 
 auth_bp = Blueprint('auth', __name__)
 
+_PROFILE_FIELDS = ('email', 'display_name', 'profile_image_url')
+
+
+def _login_bucket(at: datetime):
+    if at is None:
+        return None
+    resolution = current_app.config.get('LAST_LOGIN_RESOLUTION_SECONDS', 900) or 1
+    return int(at.replace(tzinfo=timezone.utc).timestamp() // resolution)
+
 
 @auth_bp.post('/social-login')
 def social_login():
@@ -42,15 +52,19 @@ def social_login():
         db.session.add(user)
         is_new_user = True
     else:
-        if profile.get('email'):
-            user.email = profile['email']
-        if profile.get('display_name'):
-            user.display_name = profile['display_name']
-        if profile.get('profile_image_url'):
-            user.profile_image_url = profile['profile_image_url']
-
-    user.last_login_at = datetime.utcnow()
-    db.session.commit()
+        for field in _PROFILE_FIELDS:
+            value = profile.get(field)
+            if value and getattr(user, field) != value:
+                setattr(user, field, value)
+
+    now = datetime.utcnow()
+    if _login_bucket(user.last_login_at) != _login_bucket(now):
+        user.last_login_at = now
+    # 프로필도 그대로고 같은 구간 안의 재로그인이면 UPDATE와 커밋을 건너뛴다.
+    if is_new_user or db.session.is_modified(user):
+        if not is_new_user:
+            user_cache.invalidate_on_commit(user.id)
+        db.session.commit()
     access_token = create_access_token(identity=user.id)
 
     return {'access_token': access_token, 'is_new_user': is_new_user}
@@ -0,0 +1,94 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import Blueprint, current_app, g, request
+from flask_jwt_extended import get_jwt_identity, jwt_required
+
+from ..extensions import db
+from .points import balance_payload
+from .shop import product_list_payload
+from .sleep import active_session_payload
+
+bootstrap_bp = Blueprint('bootstrap', __name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=current_app.config.get('BOOTSTRAP_WORKERS', 8),
+                    thread_name_prefix='bootstrap',
+                )
+    return _executor
+
+
+def _parallel_enabled() -> bool:
+    mode = current_app.config.get('BOOTSTRAP_PARALLEL', 'auto')
+    if mode == 'auto':
+        # SQLite는 연결을 나눠도 동시에 읽는 이득이 없어 한 세션으로 순서대로 읽는다.
+        return db.engine.dialect.name != 'sqlite'
+    return mode in ('1', 'true', True)
+
+
+def _call(fn, read_only: bool):
+    previous = g.get('_db_read_only', False)
+    g._db_read_only = read_only
+    try:
+        return fn()
+    finally:
+        g._db_read_only = previous
+
+
+def _run_in_worker(app, fn, read_only: bool):
+    # 작업마다 앱 컨텍스트를 새로 열어 각자의 세션(연결)으로 읽는다.
+    with app.app_context():
+        return _call(fn, read_only)
+
+
+@bootstrap_bp.get('/bootstrap')
+@jwt_required()
+def bootstrap():
+    """앱 시작에 필요한 잔액, 진행 중 세션, 상품 첫 페이지를 한 번에 돌려준다.
+
+    JWT는 한 번만 검증한다. BOOTSTRAP_PARALLEL이면 세 조회를 서로 다른 연결로 동시에 실행하고,
+    아니면 요청의 세션 하나로 순서대로 실행한다.
+    """
+    uid = get_jwt_identity()
+    category = request.args.get('category', 'all')
+    sort = request.args.get('sort', 'latest')
+    if sort not in ('latest', 'popular'):
+        sort = 'latest'
+    try:
+        page_size = max(min(int(request.args.get('page_size', 20)), 100), 1)
+    except ValueError:
+        page_size = 20
+    # cursor 파라미터가 있으면(빈 값) 커서 모드 첫 페이지를 준다.
+    cursor_mode = request.args.get('cursor') is not None
+
+    def products():
+        if cursor_mode:
+            payload, _, _ = product_list_payload(category, sort, None, page_size, cursor='')
+        else:
+            payload, _, _ = product_list_payload(category, sort, 1, page_size)
+        return payload
+
+    # (이름, 함수, 복제본 사용 여부). 진행 중 세션은 방금 시작한 세션이 보여야 하므로 주 DB에서 읽는다.
+    tasks = [
+        ('balance', lambda: balance_payload(uid), True),
+        ('active_session', lambda: active_session_payload(uid), False),
+        ('products', products, True),
+    ]
+
+    if _parallel_enabled():
+        app = current_app._get_current_object()
+        futures = {
+            name: _get_executor().submit(_run_in_worker, app, fn, read_only)
+            for name, fn, read_only in tasks
+        }
+        return {name: future.result() for name, future in futures.items()}
+    return {name: _call(fn, read_only) for name, fn, read_only in tasks}
@@ -0,0 +1,74 @@
+from datetime import date
+
+from flask import Blueprint, request
+from flask_jwt_extended import get_jwt_identity, jwt_required
+
+from ..services import user_cache
+from ..services.db_routing import read_only
+from ..services.leaderboard import METRICS, get_leaderboards
+from ..services.sleep_stats import week_start
+
+leaderboard_bp = Blueprint('leaderboard', __name__)
+
+
+def _resolve(metric: str):
+    """(week_start, 오류 응답)."""
+    if metric not in METRICS:
+        return None, ({'message': 'metric은 points, sleep 중 하나여야 합니다.'}, 404)
+    weeks = get_leaderboards().kept_weeks()
+    value = request.args.get('week', 'current')
+    if value == 'current':
+        return weeks[0], None
+    if value == 'previous':
+        week = weeks[1] if len(weeks) > 1 else None
+    else:
+        try:
+            week = week_start(date.fromisoformat(value))
+        except ValueError:
+            return None, ({'message': 'week는 current, previous 또는 YYYY-MM-DD 형식이어야 합니다.'}, 400)
+    if week not in weeks:
+        return None, ({'message': '조회할 수 없는 주입니다.'}, 400)
+    return week, None
+
+
+@leaderboard_bp.get('/<metric>')
+@read_only
+def top(metric):
+    """주간 순위 상위 N명. points는 그 주에 적립한 포인트, sleep은 그 주의 수면 시간(분)."""
+    week, error = _resolve(metric)
+    if error:
+        return error
+    try:
+        limit = max(min(int(request.args.get('limit', 50)), 100), 1)
+        offset = max(int(request.args.get('offset', 0)), 0)
+    except ValueError:
+        return {'message': 'limit, offset은 정수여야 합니다.'}, 400
+
+    ranked, total = get_leaderboards().top(metric, week, limit, offset)
+    users = user_cache.get_many([user_id for _, user_id, _ in ranked])
+    return {
+        'metric': metric,
+        'week_start': week.isoformat(),
+        'total': total,
+        'items': [
+            {
+                'rank': rank,
+                'user_id': user_id,
+                'display_name': users[user_id].display_name if user_id in users else None,
+                'profile_image_url': users[user_id].profile_image_url if user_id in users else None,
+                'score': score,
+            }
+            for rank, user_id, score in ranked
+        ],
+    }
+
+
+@leaderboard_bp.get('/<metric>/me')
+@jwt_required()
+@read_only
+def my_rank(metric):
+    week, error = _resolve(metric)
+    if error:
+        return error
+    rank, score, total = get_leaderboards().rank(metric, week, get_jwt_identity())
+    return {'metric': metric, 'week_start': week.isoformat(), 'rank': rank, 'score': score, 'total': total}
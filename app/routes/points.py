@@ -1,16 +1,103 @@
-from flask import Blueprint
+from datetime import datetime
+
+from flask import Blueprint, Response, current_app, request, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..extensions import db
 from ..models.user import User
 from ..models.points import UserPointLog
+from ..services.db_routing import read_only
+from ..services.pagination import InvalidCursor, decode_cursor, encode_cursor
 points_bp = Blueprint('points','points')
 
+# 엔티티 대신 필요한 컬럼만 읽는다.
+_HISTORY_COLUMNS = (
+    UserPointLog.id,
+    UserPointLog.change,
+    UserPointLog.balance_after,
+    UserPointLog.type,
+    UserPointLog.created_at,
+)
+_EXPORT_BATCH_SIZE = 1000
+
+
+def _history_query(uid):
+    return (
+        db.session.query(*_HISTORY_COLUMNS)
+        .filter(UserPointLog.user_id == uid)
+        .order_by(UserPointLog.created_at.desc(), UserPointLog.id.desc())
+    )
+
+
+def _history_item(row):
+    return {
+        'id': row.id,
+        'change': row.change,
+        'bal': row.balance_after,
+        'type': row.type,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+    }
+
+
+def balance_payload(uid) -> dict:
+    return {'total_points': db.session.query(User.total_points).filter(User.id == uid).scalar()}
+
+
 @points_bp.get('/balance')
 @jwt_required()
-def bal(): return {'total_points': User.query.get(get_jwt_identity()).total_points}
+@read_only
+def bal(): return balance_payload(get_jwt_identity())
 
 @points_bp.get('/history')
 @jwt_required()
+@read_only
 def hist():
     uid=get_jwt_identity()
-    rows=UserPointLog.query.filter_by(user_id=uid).all()
-    return [{'id':r.id,'change':r.change,'bal':r.balance_after} for r in rows]
+    cursor = request.args.get('cursor')
+    if cursor is None and 'limit' not in request.args:
+        # 기존 클라이언트용: 전체 목록
+        return [{'id':r.id,'change':r.change,'bal':r.balance_after} for r in _history_query(uid)]
+
+    try:
+        limit = int(request.args.get('limit', 50))
+    except ValueError:
+        limit = 50
+    limit = max(min(limit, 200), 1)
+
+    query = _history_query(uid)
+    if cursor:
+        try:
+            after = decode_cursor(cursor, datetime, int)
+        except InvalidCursor:
+            return {'message': '잘못된 cursor 값입니다.'}, 400
+        query = query.filter(db.tuple_(UserPointLog.created_at, UserPointLog.id) < after)
+
+    rows = query.limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    return {'items': [_history_item(r) for r in items], 'next_cursor': next_cursor}
+
+@points_bp.get('/history/export')
+@jwt_required()
+@read_only
+def export_hist():
+    """전체 원장을 JSON Lines로 스트리밍한다. 서버 측 커서로 읽어 메모리 사용량이 일정하다."""
+    uid=get_jwt_identity()
+
+    def generate():
+        rows = (
+            _history_query(uid)
+            .execution_options(stream_results=True)
+            .yield_per(_EXPORT_BATCH_SIZE)
+        )
+        chunk = []
+        for row in rows:
+            chunk.append(current_app.json.dumps(_history_item(row)))
+            if len(chunk) >= _EXPORT_BATCH_SIZE:
+                yield '\n'.join(chunk) + '\n'
+                chunk = []
+        if chunk:
+            yield '\n'.join(chunk) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
@@ -1,4 +1,113 @@
-from flask import Blueprint
-rewards_bp = Blueprint('rewards','rewards')
+from datetime import datetime
+
+from flask import Blueprint, request
+from flask_jwt_extended import get_jwt_identity, jwt_required
+
+from ..extensions import db
+from ..models.rewards import Reward, RewardRedemption
+from ..services import rewards
+from ..services.db_routing import read_only
+from ..services.pagination import InvalidCursor, decode_cursor, encode_cursor
+
+rewards_bp = Blueprint('rewards', 'rewards')
+
+_REWARD_COLUMNS = (
+    Reward.id,
+    Reward.title,
+    Reward.description,
+    Reward.image_url,
+    Reward.cost,
+    Reward.stock_total,
+)
+_ERROR_STATUS = {
+    'not_found': 404,
+    'insufficient_points': 400,
+    'sold_out': 409,
+    'idempotency_conflict': 422,
+}
+
+
+def _serialize_reward(row, remaining: dict) -> dict:
+    return {
+        'id': row.id,
+        'title': row.title,
+        'description': row.description,
+        'image_url': row.image_url,
+        'cost': row.cost,
+        'remaining': remaining.get(row.id) if row.stock_total is not None else None,
+    }
+
+
 @rewards_bp.get('/')
-def list(): return []
+@read_only
+def list_rewards():
+    rows = (
+        db.session.query(*_REWARD_COLUMNS)
+        .filter(Reward.is_active.is_(True))
+        .order_by(Reward.cost, Reward.id)
+        .all()
+    )
+    remaining = rewards.remaining_stock([row.id for row in rows if row.stock_total is not None])
+    return [_serialize_reward(row, remaining) for row in rows]
+
+
+@rewards_bp.get('/<int:reward_id>')
+@read_only
+def get_reward(reward_id):
+    row = (
+        db.session.query(*_REWARD_COLUMNS)
+        .filter(Reward.id == reward_id, Reward.is_active.is_(True))
+        .first()
+    )
+    if not row:
+        return {'message': '리워드를 찾을 수 없습니다.'}, 404
+    remaining = rewards.remaining_stock([row.id]) if row.stock_total is not None else {}
+    return _serialize_reward(row, remaining)
+
+
+@rewards_bp.post('/<int:reward_id>/redeem')
+@jwt_required()
+def redeem(reward_id):
+    """포인트로 리워드를 교환한다. Idempotency-Key 헤더(또는 idempotency_key)로 재시도를 구분한다."""
+    key = request.headers.get('Idempotency-Key') or (request.get_json(silent=True) or {}).get('idempotency_key')
+    if not key or not isinstance(key, str) or len(key) > 64:
+        return {'message': 'Idempotency-Key는 64자 이하의 필수 값입니다.'}, 400
+
+    try:
+        result, created = rewards.redeem(get_jwt_identity(), reward_id, key)
+    except rewards.RedemptionError as exc:
+        return {'message': exc.message, 'code': exc.code}, _ERROR_STATUS.get(exc.code, 400)
+    return result, 201 if created else 200
+
+
+@rewards_bp.get('/redemptions')
+@jwt_required()
+@read_only
+def list_redemptions():
+    uid = get_jwt_identity()
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        limit = 20
+    limit = max(min(limit, 100), 1)
+
+    query = (
+        db.session.query(
+            RewardRedemption.id, RewardRedemption.reward_id, RewardRedemption.cost,
+            RewardRedemption.balance_after, RewardRedemption.created_at,
+        )
+        .filter(RewardRedemption.user_id == uid)
+        .order_by(RewardRedemption.created_at.desc(), RewardRedemption.id.desc())
+    )
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            after = decode_cursor(cursor, datetime, int)
+        except InvalidCursor:
+            return {'message': '잘못된 cursor 값입니다.'}, 400
+        query = query.filter(db.tuple_(RewardRedemption.created_at, RewardRedemption.id) < after)
+
+    rows = query.limit(limit + 1).all()
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1].created_at, items[-1].id) if len(rows) > limit else None
+    return {'items': [rewards.serialize_redemption(r) for r in items], 'next_cursor': next_cursor}
@@ -1,13 +1,53 @@
-from flask import Blueprint, request
+from datetime import datetime
+
+from flask import Blueprint, current_app, jsonify, request
 from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
 
 from ..extensions import db
-from ..models.shop import ShopProduct, ShopClickLog
+from ..models.shop import ShopProduct
+from ..services import catalog, click_rollup, product_search
+from ..services.cache import TTLCache
+from ..services.db_routing import read_only
+from ..services.pagination import InvalidCursor, decode_cursor, encode_cursor
 
 shop_bp = Blueprint('shop', __name__)
 
+CLICK_SOURCE_MAX_LENGTH = 50  # shop_click_logs.source 컬럼 길이
+
+# 목록은 엔티티 대신 이 컬럼들만 읽는다. (detail_description, partners_url 등 Text 컬럼 제외)
+_LIST_COLUMNS = (
+    ShopProduct.id,
+    ShopProduct.title,
+    ShopProduct.subtitle,
+    ShopProduct.category,
+    ShopProduct.tag,
+    ShopProduct.price,
+    ShopProduct.discount_rate,
+    ShopProduct.rating,
+    ShopProduct.review_count,
+    ShopProduct.is_recommended,
+    ShopProduct.thumb_url,
+    ShopProduct.icon_bg_color,
+    ShopProduct.created_at,
+    ShopProduct.popularity_score,
+)
+
+# 정렬 방식별 ORDER BY 키(모두 DESC)와 커서 값 타입
+_SORTS = {
+    'latest': (
+        (ShopProduct.is_recommended, ShopProduct.created_at, ShopProduct.id),
+        (bool, datetime, int),
+    ),
+    'popular': (
+        (ShopProduct.popularity_score, ShopProduct.id),
+        (int, int),
+    ),
+}
+
+_top_cache = None
 
-def _serialize_list_item(product: ShopProduct):
+
+def _serialize_list_item(product):
     return {
         'id': product.id,
         'title': product.title,
@@ -33,9 +73,70 @@ def _serialize_detail(product: ShopProduct):
     return data
 
 
+def _cached_total(filters: list, category: str) -> int:
+    """활성 상품 수. 카탈로그 버전이 바뀔 때까지 캐시한다."""
+    return catalog.cached_value(
+        'total', (category,),
+        lambda: db.session.query(db.func.count(ShopProduct.id)).filter(*filters).scalar(),
+    )
+
+
+def _conditional_response(payload, status: int, etag: str):
+    if status != 200:
+        return payload, status
+    resp = jsonify(payload)
+    resp.set_etag(etag)
+    resp.cache_control.no_cache = True
+    return resp.make_conditional(request)
+
+
+def _build_product_list(category: str, sort: str, page: int, page_size: int, cursor, after, with_total: bool):
+    filters = [ShopProduct.is_active.is_(True)]
+    if category and category != 'all':
+        filters.append(ShopProduct.category == category)
+    sort_keys, _ = _SORTS[sort]
+    ordered = db.session.query(*_LIST_COLUMNS).filter(*filters).order_by(*[c.desc() for c in sort_keys])
+
+    if cursor is None:
+        # 기존 클라이언트용 page/page_size 계약
+        items = ordered.offset((page - 1) * page_size).limit(page_size).all()
+        return {
+            'items': [_serialize_list_item(p) for p in items],
+            'page': page,
+            'page_size': page_size,
+            'total': _cached_total(filters, category),
+        }, 200
+
+    # 커서 모드: 정렬 키 튜플을 키셋으로 다음 페이지를 찾는다.
+    if after is not None:
+        ordered = ordered.filter(db.tuple_(*sort_keys) < after)
+
+    rows = ordered.limit(page_size + 1).all()
+    items = rows[:page_size]
+    next_cursor = None
+    if len(rows) > page_size:
+        last = items[-1]
+        next_cursor = encode_cursor(*[getattr(last, c.key) for c in sort_keys])
+
+    result = {
+        'items': [_serialize_list_item(p) for p in items],
+        'page_size': page_size,
+        'next_cursor': next_cursor,
+    }
+    if with_total:
+        result['total'] = _cached_total(filters, category)
+    return result, 200
+
+
 @shop_bp.get('/products')
+@read_only
 def list_products():
     category = request.args.get('category', 'all')
+    sort = request.args.get('sort', 'latest')
+    if sort not in _SORTS:
+        return {'message': 'sort는 latest, popular 중 하나여야 합니다.'}, 400
+    cursor = request.args.get('cursor')
+    with_total = request.args.get('with_total') in ('1', 'true')
     try:
         page = int(request.args.get('page', 1))
     except ValueError:
@@ -48,44 +149,137 @@ def list_products():
     page = max(page, 1)
     page_size = max(min(page_size, 100), 1)
 
-    query = ShopProduct.query.filter_by(is_active=True)
-    if category and category != 'all':
-        query = query.filter(ShopProduct.category == category)
-
-    total = query.count()
-    items = (
-        query
-        .order_by(ShopProduct.is_recommended.desc(), ShopProduct.created_at.desc())
-        .offset((page - 1) * page_size)
-        .limit(page_size)
-        .all()
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor, *_SORTS[sort][1])
+        except InvalidCursor:
+            return {'message': '잘못된 cursor 값입니다.'}, 400
+    if cursor is not None:
+        page = None
+
+    payload, status, etag = product_list_payload(category, sort, page, page_size, cursor, after, with_total)
+    return _conditional_response(payload, status, etag)
+
+
+def product_list_payload(category='all', sort='latest', page=1, page_size=20, cursor=None, after=None,
+                         with_total=False):
+    """상품 목록 (payload, status, etag). 카탈로그 버전 기준으로 캐시되고, popular 정렬은 인기 세대 번호도 키에 넣는다.
+
+    인기 점수 갱신은 updated_at(카탈로그 버전)을 건드리지 않으므로, 세대 번호가 없으면 캐시된 앞 페이지와
+    새로 만든 뒤 페이지의 순서가 섞인다.
+    """
+    generation = click_rollup.popularity_version() if sort == 'popular' else None
+    return catalog.cached(
+        'list',
+        (category, sort, generation, page, page_size, cursor, with_total),
+        lambda: _build_product_list(category, sort, page, page_size, cursor, after, with_total),
     )
 
-    return {
-        'items': [_serialize_list_item(p) for p in items],
-        'page': page,
-        'page_size': page_size,
-        'total': total,
-    }
 
+def _get_top_cache() -> TTLCache:
+    global _top_cache
+    if _top_cache is None:
+        _top_cache = TTLCache(maxsize=256, ttl=current_app.config.get('SHOP_TOP_CACHE_TTL', 60))
+    return _top_cache
 
-@shop_bp.get('/products/<int:product_id>')
-def get_product(product_id):
+
+def _build_top_products(hours: int, limit: int, source):
+    ranked = click_rollup.top_products(hours, limit, source)
+    clicks = dict(ranked)
+    rows = db.session.query(*_LIST_COLUMNS).filter(ShopProduct.id.in_(list(clicks))).all() if ranked else []
+    by_id = {row.id: row for row in rows}
+    items = [
+        {**_serialize_list_item(by_id[product_id]), 'clicks': n}
+        for product_id, n in ranked if product_id in by_id
+    ]
+    return {'hours': hours, 'source': source, 'items': items}
+
+
+@shop_bp.get('/products/top')
+@read_only
+def top_products():
+    """최근 hours 시간 동안 클릭이 많은 상품. 시간별 클릭 집계에서 읽는다."""
+    try:
+        hours = int(request.args.get('hours', 24))
+        limit = int(request.args.get('limit', 10))
+    except ValueError:
+        return {'message': 'hours와 limit은 정수여야 합니다.'}, 400
+    hours = max(min(hours, 24 * 30), 1)
+    limit = max(min(limit, 50), 1)
+    source = request.args.get('source')
+
+    return _get_top_cache().get_or_set(
+        (hours, limit, source), lambda: _build_top_products(hours, limit, source),
+    )
+
+
+def _build_search(query: str, limit: int):
+    ranked = product_search.search_products(query, limit)
+    scores = dict(ranked)
+    rows = db.session.query(*_LIST_COLUMNS).filter(ShopProduct.id.in_(list(scores))).all() if ranked else []
+    by_id = {row.id: row for row in rows}
+    items = []
+    for product_id, score in ranked:
+        row = by_id.get(product_id)
+        if row is not None:
+            items.append({**_serialize_list_item(row), 'score': score})
+    return {'query': query, 'items': items}, 200
+
+
+@shop_bp.get('/search')
+@read_only
+def search_products():
+    query = product_search.normalize(request.args.get('q'))
+    if not query:
+        return {'message': 'q는 필수입니다.'}, 400
+    if len(query) > 100:
+        return {'message': 'q는 100자 이하여야 합니다.'}, 400
+    try:
+        limit = int(request.args.get('limit', 20))
+    except ValueError:
+        limit = 20
+    limit = max(min(limit, 50), 1)
+
+    payload, status, etag = catalog.cached(
+        'search', (query, limit), lambda: _build_search(query, limit),
+    )
+    return _conditional_response(payload, status, etag)
+
+
+def _build_product_detail(product_id: int):
     product = ShopProduct.query.get(product_id)
     if not product:
         return {'message': '상품을 찾을 수 없습니다.'}, 404
     if not product.is_active:
         return {'message': '비활성화된 상품입니다.'}, 410
+    return _serialize_detail(product), 200
+
+
+@shop_bp.get('/products/<int:product_id>')
+@read_only
+def get_product(product_id):
+    payload, status, etag = catalog.cached(
+        'detail', (product_id,), lambda: _build_product_detail(product_id),
+    )
+    return _conditional_response(payload, status, etag)
 
-    return _serialize_detail(product)
+
+def _click_targets() -> dict:
+    """{product_id: (is_active, partners_url)} 매핑. 카탈로그 버전이 바뀔 때까지 캐시한다."""
+    def build():
+        rows = db.session.query(ShopProduct.id, ShopProduct.is_active, ShopProduct.partners_url)
+        return {row.id: (row.is_active, row.partners_url) for row in rows}
+    return catalog.cached_value('click_targets', (), build)
 
 
 @shop_bp.post('/products/<int:product_id>/click')
 def click_product(product_id):
-    product = ShopProduct.query.get(product_id)
-    if not product:
+    target = _click_targets().get(product_id)
+    if not target:
         return {'message': '상품을 찾을 수 없습니다.'}, 404
-    if not product.is_active:
+    is_active, partners_url = target
+    if not is_active:
         return {'message': '비활성화된 상품입니다.'}, 410
 
     # JWT가 있으면 사용, 없어도 통과
@@ -95,18 +289,16 @@ def click_product(product_id):
     except Exception:
         user_id = None
 
-    payload = request.get_json(silent=True) or {}
-    source = payload.get('source')
-    user_agent = request.headers.get('User-Agent')
-
-    log = ShopClickLog(
+    payload = request.get_json(silent=True)
+    source = payload.get('source') if isinstance(payload, dict) else None
+    if not isinstance(source, str):
+        source = None
+    current_app.extensions['click_log_writer'].submit(
         user_id=user_id,
-        product_id=product.id,
-        source=source,
-        user_agent=user_agent,
-        out_url=product.partners_url,
+        product_id=product_id,
+        source=source[:CLICK_SOURCE_MAX_LENGTH] if source else None,
+        user_agent=request.headers.get('User-Agent'),
+        out_url=partners_url,
     )
-    db.session.add(log)
-    db.session.commit()
 
-    return {'redirect_url': product.partners_url}
+    return {'redirect_url': partners_url}
@@ -1,18 +1,41 @@
-from datetime import datetime, timedelta
-from flask import Blueprint, request
+from datetime import date, datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from flask import Blueprint, current_app, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy.exc import IntegrityError
 
 from ..extensions import db
 from ..models.sleep import SleepLog
-from ..models.user import User
-from ..models.points import UserPointLog
+from ..services.ad_events import build_event
+from ..services.db_routing import read_only
+from ..services.reward_counter import claim_daily_points, claim_daily_points_bulk
+from ..services import ledger, sleep_stats
 
 sleep_bp = Blueprint('sleep', __name__)
 
 DAILY_SLEEP_POINT_LIMIT = 200
+SYNC_MAX_SESSIONS = 500
+SYNC_CLOCK_SKEW = timedelta(minutes=5)
+
+
+# 조회 응답은 엔티티 대신 이 컬럼들만 읽는다.
+_SESSION_COLUMNS = (
+    SleepLog.id,
+    SleepLog.user_id,
+    SleepLog.started_at,
+    SleepLog.ended_at,
+    SleepLog.total_sleep_minutes,
+    SleepLog.sleep_score,
+    SleepLog.mood,
+    SleepLog.memo,
+    SleepLog.white_noise_type,
+    SleepLog.white_noise_volume,
+    SleepLog.status,
+)
 
 
-def _sleep_dict(session: SleepLog):
+def _sleep_dict(session):
     return {
         'id': session.id,
         'started_at': session.started_at.isoformat() if session.started_at else None,
@@ -27,44 +50,96 @@ def _sleep_dict(session: SleepLog):
     }
 
 
-def _today_sleep_points(user_id: int) -> int:
-    """오늘 UTC 기준 수면 리워드 합계."""
-    today = datetime.utcnow().date()
-    start = datetime.combine(today, datetime.min.time())
-    end = start + timedelta(days=1)
-    total = (
-        db.session.query(db.func.coalesce(db.func.sum(UserPointLog.change), 0))
-        .filter(
-            UserPointLog.user_id == user_id,
-            UserPointLog.type == 'sleep_reward',
-            UserPointLog.created_at >= start,
-            UserPointLog.created_at < end,
-        )
-        .scalar()
-    )
-    return int(total or 0)
+def _default_score(total_sleep_minutes: int) -> int:
+    return min(100, 70 + total_sleep_minutes // 10)
 
 
-@sleep_bp.get('/active-session')
-@jwt_required()
-def active_session():
-    uid = get_jwt_identity()
-    session = (
-        SleepLog.query
-        .filter_by(user_id=uid, status='running', ended_at=None)
-        .order_by(SleepLog.started_at.desc())
+def _parse_utc(value):
+    """ISO 8601 문자열을 UTC naive datetime으로. 형식이 틀리면 None."""
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def _validate_sync_item(item, now):
+    """동기화 항목을 검증해 (SleepLog 컬럼 dict, None) 또는 (None, 오류 메시지)를 돌려준다."""
+    if not isinstance(item, dict):
+        return None, '세션 형식이 올바르지 않습니다.'
+    client_session_id = item.get('client_session_id')
+    if not isinstance(client_session_id, str) or not 0 < len(client_session_id) <= 64:
+        return None, 'client_session_id는 1~64자 문자열이어야 합니다.'
+    started_at = _parse_utc(item.get('started_at'))
+    ended_at = _parse_utc(item.get('ended_at'))
+    if not started_at or not ended_at:
+        return None, 'started_at, ended_at은 ISO 8601 형식이어야 합니다.'
+    if ended_at < started_at or ended_at > now + SYNC_CLOCK_SKEW:
+        return None, '세션 시간이 올바르지 않습니다.'
+
+    volume = item.get('white_noise_volume')
+    if volume is not None:
+        try:
+            volume = int(volume)
+        except (TypeError, ValueError):
+            return None, 'white_noise_volume은 0~100 정수여야 합니다.'
+        if volume < 0 or volume > 100:
+            return None, 'white_noise_volume은 0~100 범위여야 합니다.'
+
+    score = item.get('sleep_score')
+    if score is not None:
+        try:
+            score = int(score)
+        except (TypeError, ValueError):
+            return None, 'sleep_score는 정수여야 합니다.'
+
+    minutes = max(int((ended_at - started_at).total_seconds() // 60), 0)
+    return {
+        'client_session_id': client_session_id,
+        'started_at': started_at,
+        'ended_at': ended_at,
+        'created_at': now,
+        'total_sleep_minutes': minutes,
+        'sleep_score': score or _default_score(minutes),
+        'mood': item.get('mood'),
+        'memo': item.get('memo'),
+        'white_noise_type': item.get('white_noise_type'),
+        'white_noise_volume': volume,
+        'status': 'ended',
+    }, None
+
+
+def _running_session(uid):
+    """진행 중 세션(컬럼 행). uq_sleep_logs_user_running 부분 인덱스를 한 번 조회한다."""
+    return (
+        db.session.query(*_SESSION_COLUMNS)
+        .filter(SleepLog.user_id == uid, SleepLog.status == 'running')
         .first()
     )
+
+
+def active_session_payload(uid) -> dict:
+    session = _running_session(uid)
     if not session:
         return {'has_active_session': False}
     return {'has_active_session': True, 'session': _sleep_dict(session)}
 
 
+@sleep_bp.get('/active-session')
+@jwt_required()
+def active_session():
+    return active_session_payload(get_jwt_identity())
+
+
 @sleep_bp.post('/sessions')
 @jwt_required()
 def create_session():
     uid = get_jwt_identity()
-    existing = SleepLog.query.filter_by(user_id=uid, status='running', ended_at=None).first()
+    existing = _running_session(uid)
     if existing:
         return {'message': '이미 진행 중인 세션이 있습니다.', 'session_id': existing.id}, 400
 
@@ -93,15 +168,28 @@ def create_session():
         status='running',
     )
     db.session.add(session)
-    db.session.commit()
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # 동시에 들어온 생성 요청은 uq_sleep_logs_user_running 인덱스가 막는다.
+        db.session.rollback()
+        existing = _running_session(uid)
+        if not existing:
+            raise
+        return {'message': '이미 진행 중인 세션이 있습니다.', 'session_id': existing.id}, 400
     return {'session_id': session.id, 'started_at': session.started_at.isoformat()}, 201
 
 
 @sleep_bp.get('/sessions/<int:session_id>')
 @jwt_required()
+@read_only
 def get_session(session_id):
     uid = get_jwt_identity()
-    session = SleepLog.query.filter_by(id=session_id, user_id=uid).first()
+    session = (
+        db.session.query(*_SESSION_COLUMNS)
+        .filter(SleepLog.id == session_id, SleepLog.user_id == uid)
+        .first()
+    )
     if not session:
         return {'message': '세션을 찾을 수 없습니다.'}, 404
     return _sleep_dict(session)
@@ -151,25 +239,14 @@ def end_session(session_id):
     session.ended_at = now
     session.status = 'ended'
     session.total_sleep_minutes = max(int((now - session.started_at).total_seconds() // 60), 0)
-    session.sleep_score = session.sleep_score or min(100, 70 + session.total_sleep_minutes // 10)
-
-    today_points = _today_sleep_points(uid)
-    remaining = max(DAILY_SLEEP_POINT_LIMIT - today_points, 0)
-    points_earned = min(session.total_sleep_minutes or 0, remaining)
-
-    user = User.query.get(uid)
-    if user.total_points is None:
-        user.total_points = 0
-    user.total_points += points_earned
+    session.sleep_score = session.sleep_score or _default_score(session.total_sleep_minutes)
 
-    txn = UserPointLog(
-        user_id=uid,
-        change=points_earned,
-        balance_after=user.total_points,
-        type='sleep_reward',
-        sleep_log_id=session.id,
+    points_earned, today_total_points = claim_daily_points(
+        uid, 'sleep_reward', session.total_sleep_minutes or 0, DAILY_SLEEP_POINT_LIMIT,
     )
-    db.session.add(txn)
+
+    ledger.credit(uid, points_earned, 'sleep_reward', sleep_log_id=session.id)
+    sleep_stats.record_sessions(uid, [session])
     db.session.commit()
 
     return {
@@ -177,23 +254,126 @@ def end_session(session_id):
         'total_sleep_minutes': session.total_sleep_minutes,
         'sleep_score': session.sleep_score,
         'points_earned': points_earned,
-        'today_total_points': today_points + points_earned,
+        'today_total_points': today_total_points,
         'daily_limit': DAILY_SLEEP_POINT_LIMIT,
         'started_at': session.started_at.isoformat() if session.started_at else None,
         'ended_at': session.ended_at.isoformat() if session.ended_at else None,
     }
 
 
+@sleep_bp.post('/sessions/sync')
+@jwt_required()
+def sync_sessions():
+    """오프라인에서 기록한 완료 세션들을 한 트랜잭션으로 반영한다.
+
+    client_session_id로 중복을 거르고, 세션 수와 관계없이 일정한 횟수의 다중 행 쿼리로 처리한다.
+    """
+    uid = get_jwt_identity()
+    items = (request.get_json(silent=True) or {}).get('sessions')
+    if not isinstance(items, list) or not items:
+        return {'message': 'sessions 목록이 필요합니다.'}, 400
+    if len(items) > SYNC_MAX_SESSIONS:
+        return {'message': f'한 번에 최대 {SYNC_MAX_SESSIONS}개까지 동기화할 수 있습니다.'}, 400
+
+    now = datetime.utcnow()
+    rejected, candidates = [], {}
+    for index, item in enumerate(items):
+        row, error = _validate_sync_item(item, now)
+        if error:
+            key = item.get('client_session_id') if isinstance(item, dict) else None
+            rejected.append({'index': index, 'client_session_id': key, 'message': error})
+        else:
+            candidates.setdefault(row['client_session_id'], row)  # 같은 요청 안의 중복은 처음 것만
+
+    existing = dict(
+        db.session.query(SleepLog.client_session_id, SleepLog.id)
+        .filter(SleepLog.user_id == uid, SleepLog.client_session_id.in_(list(candidates)))
+        .all()
+    ) if candidates else {}
+    duplicates = [{'client_session_id': key, 'session_id': sid} for key, sid in existing.items()]
+    rows = sorted(
+        (row for key, row in candidates.items() if key not in existing),
+        key=lambda row: row['ended_at'],
+    )
+    if not rows:
+        return {'synced': [], 'duplicates': duplicates, 'rejected': rejected}
+
+    for row in rows:
+        row['user_id'] = uid
+    table = SleepLog.__table__
+    try:
+        # 지급일은 세션이 끝난 UTC 날짜 기준
+        granted = claim_daily_points_bulk(
+            uid, 'sleep_reward',
+            [(row['ended_at'].date(), row['total_sleep_minutes']) for row in rows],
+            DAILY_SLEEP_POINT_LIMIT,
+        )
+        # RETURNING 순서 보장은 일부 DB에서 행 단위 INSERT로 떨어지므로 키로 매칭한다.
+        session_ids = dict(
+            (key, session_id) for session_id, key in db.session.execute(
+                table.insert().returning(table.c.id, table.c.client_session_id), rows,
+            )
+        )
+        total_points = ledger.credit_many(
+            uid,
+            [(points, session_ids[row['client_session_id']]) for row, points in zip(rows, granted)],
+            'sleep_reward',
+            created_at=now,
+        )
+        sleep_stats.record_sessions(uid, [SimpleNamespace(**row) for row in rows])
+        db.session.commit()
+    except IntegrityError:
+        # 같은 client_session_id로 동시에 들어온 동기화 요청. INSERT에서든 커밋에서든 유니크 인덱스가 막는다.
+        db.session.rollback()
+        return {'message': '동시에 진행 중인 동기화가 있습니다. 다시 시도해 주세요.'}, 409
+
+    return {
+        'synced': [
+            {
+                'client_session_id': row['client_session_id'],
+                'session_id': session_ids[row['client_session_id']],
+                'points_earned': points,
+            }
+            for row, points in zip(rows, granted)
+        ],
+        'duplicates': duplicates,
+        'rejected': rejected,
+        'total_points': total_points,
+        'daily_limit': DAILY_SLEEP_POINT_LIMIT,
+    }
+
+
+@sleep_bp.get('/stats')
+@jwt_required()
+@read_only
+def stats():
+    uid = get_jwt_identity()
+    period = request.args.get('period', 'week')
+    if period not in ('week', 'month'):
+        return {'message': 'period는 week 또는 month여야 합니다.'}, 400
+    try:
+        anchor = date.fromisoformat(request.args['date']) if 'date' in request.args else datetime.utcnow().date()
+    except ValueError:
+        return {'message': 'date는 YYYY-MM-DD 형식이어야 합니다.'}, 400
+    return sleep_stats.get_stats(uid, period, anchor)
+
+
+def _log_ad_event(event_type: str):
+    # 버퍼에 넣기만 하고 바로 응답한다. DB 적재는 `flask ads compact`가 담당.
+    # 객체가 아닌 본문(배열 등)도 예전처럼 그대로 돌려주고, 이벤트 필드는 비워 둔다.
+    payload = request.get_json(silent=True) or {}
+    event = build_event(event_type, payload, get_jwt_identity(), request.headers.get('User-Agent'))
+    current_app.extensions['ad_event_log'].append(event)
+    return {'logged': True, 'event': event_type, 'data': payload}, 200
+
+
 @sleep_bp.post('/ad-impression')
 @jwt_required(optional=True)
 def ad_impression():
-    # MVP: 로그 저장소가 없으므로 요청 데이터와 UA만 반환. 추후 DB/analytics로 확장.
-    payload = request.get_json(silent=True) or {}
-    return {'logged': True, 'event': 'impression', 'data': payload}, 200
+    return _log_ad_event('impression')
 
 
 @sleep_bp.post('/ad-click')
 @jwt_required(optional=True)
 def ad_click():
-    payload = request.get_json(silent=True) or {}
-    return {'logged': True, 'event': 'click', 'data': payload}, 200
+    return _log_ad_event('click')
@@ -0,0 +1,302 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+
+from ..extensions import db
+from ..models.ads import AdEvent, AdEventHourly
+from .sql import dialect_insert, upsert_increment
+
+logger = logging.getLogger(__name__)
+
+OPEN_SUFFIX = '.ndjson.open'
+SEALED_SUFFIX = '.ndjson'
+COMPACTING_SUFFIX = '.ndjson.compacting'
+REJECTED_SUFFIX = '.ndjson.rejected'  # 적재할 수 없는 줄을 옮겨 두는 파일. 다시 집어 가지 않는다.
+FAILED_SUFFIX = '.ndjson.failed'  # 처리 중 예상하지 못한 오류가 난 세그먼트. .ndjson으로 바꾸면 다시 적재한다.
+
+_COLUMN_LENGTHS = {
+    column.name: column.type.length
+    for column in AdEvent.__table__.columns
+    if getattr(column.type, 'length', None)
+}
+
+
+class AdEventLog:
+    """광고 이벤트를 메모리 버퍼에 모았다가 NDJSON 세그먼트 파일에 append하는 수집기.
+
+    요청 스레드는 append()로 버퍼에 넣기만 하고, 백그라운드 스레드가 AD_EVENT_FLUSH_INTERVAL
+    마다 현재 세그먼트(.ndjson.open)에 기록한다. 세그먼트가 AD_EVENT_SEGMENT_MAX_BYTES 또는
+    AD_EVENT_SEGMENT_MAX_AGE 초를 넘으면 .ndjson으로 봉인되고 compact_segments()가 DB로 옮긴다.
+    """
+
+    def __init__(self, app):
+        config = app.config
+        self.segment_dir = config.get('AD_EVENT_SEGMENT_DIR')
+        self.flush_interval = config.get('AD_EVENT_FLUSH_INTERVAL', 0.5)
+        self.buffer_max = config.get('AD_EVENT_BUFFER_MAX', 5000)
+        self.segment_max_bytes = config.get('AD_EVENT_SEGMENT_MAX_BYTES', 64 * 1024 * 1024)
+        self.segment_max_age = config.get('AD_EVENT_SEGMENT_MAX_AGE', 60)
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._file_lock = threading.Lock()
+        self._segment = None  # (path, file, opened_at)
+        self._thread = None
+        self._pid = None
+        self._stopped = threading.Event()
+
+    def append(self, event: dict):
+        self._ensure_started()
+        with self._buffer_lock:
+            self._buffer.append(event)
+            overflow = len(self._buffer) >= self.buffer_max
+        if overflow:
+            # 백그라운드 스레드가 밀리면 요청 스레드가 직접 파일에 쓴다.
+            self.flush()
+
+    def flush(self):
+        with self._buffer_lock:
+            events, self._buffer = self._buffer, []
+        if not events:
+            return
+        data = ''.join(json.dumps(e, ensure_ascii=False, separators=(',', ':')) + '\n' for e in events)
+        with self._file_lock:
+            path, fp, opened_at = self._current_segment()
+            fp.write(data)
+            fp.flush()
+            if fp.tell() >= self.segment_max_bytes or time.monotonic() - opened_at >= self.segment_max_age:
+                self._seal()
+
+    def rotate(self):
+        """버퍼를 비우고 현재 세그먼트를 봉인한다."""
+        self.flush()
+        with self._file_lock:
+            self._seal()
+
+    def stop(self):
+        self._stopped.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            thread.join(self.flush_interval * 4)
+        self._thread = None
+        self.rotate()
+
+    def _current_segment(self):
+        if self._segment is None:
+            os.makedirs(self.segment_dir, exist_ok=True)
+            name = f'ad-{os.getpid()}-{time.time_ns()}{OPEN_SUFFIX}'
+            path = os.path.join(self.segment_dir, name)
+            self._segment = (path, open(path, 'a', encoding='utf-8'), time.monotonic())
+        return self._segment
+
+    def _seal(self):
+        if self._segment is None:
+            return
+        path, fp, _ = self._segment
+        fp.close()
+        os.replace(path, path[:-len(OPEN_SUFFIX)] + SEALED_SUFFIX)
+        self._segment = None
+
+    def _ensure_started(self):
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._buffer_lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            # fork된 자식은 부모의 열린 세그먼트를 이어 쓰지 않는다.
+            self._segment = None
+            self._pid = os.getpid()
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._run, name='ad-event-log', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+                with self._file_lock:
+                    if self._segment and time.monotonic() - self._segment[2] >= self.segment_max_age:
+                        self._seal()
+            except OSError:
+                logger.exception('ad event segment write failed')
+
+
+def _text(value, column: str):
+    """클라이언트가 보낸 값을 컬럼에 들어가는 문자열로. 숫자는 문자열로 바꾸고, 그 밖의 타입은 버리고, 길면 자른다."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = str(value)
+    if not isinstance(value, str):
+        return None
+    return value[:_COLUMN_LENGTHS[column]]
+
+
+def build_event(event_type: str, payload, user_id, user_agent) -> dict:
+    fields = payload if isinstance(payload, dict) else {}
+    return {
+        'event_id': uuid.uuid4().hex,
+        'event_type': event_type,
+        'user_id': user_id,
+        'placement': _text(fields.get('placement'), 'placement'),
+        'ad_unit_id': _text(fields.get('ad_unit_id'), 'ad_unit_id'),
+        'network': _text(fields.get('network'), 'network'),
+        'payload': payload,
+        'user_agent': user_agent,
+        'created_at': datetime.utcnow().isoformat(),
+    }
+
+
+def _claimable_segments(segment_dir: str, stale_after: float):
+    """봉인된 세그먼트와, 중단된 compaction/프로세스가 남긴 오래된 파일을 돌려준다."""
+    now = time.time()
+    for name in sorted(os.listdir(segment_dir)):
+        path = os.path.join(segment_dir, name)
+        if name.endswith(SEALED_SUFFIX) or name.endswith(COMPACTING_SUFFIX):
+            yield path
+        elif name.endswith(OPEN_SUFFIX) and now - os.path.getmtime(path) > stale_after:
+            yield path
+
+
+def _parse_line(line: str):
+    """세그먼트의 한 줄을 ad_events 행으로. 적재할 수 없는 줄이면 None.
+
+    이전 버전이 검증 없이 기록한 세그먼트도 있으므로 문자열 컬럼은 여기서 다시 맞춘다.
+    """
+    try:
+        event = json.loads(line)
+        if not isinstance(event, dict):
+            return None
+        event['created_at'] = datetime.fromisoformat(event['created_at'])
+    except (ValueError, TypeError, KeyError):
+        return None
+    if not isinstance(event.get('event_id'), str) or not isinstance(event.get('event_type'), str):
+        return None
+    for column in ('placement', 'ad_unit_id', 'network'):
+        event[column] = _text(event.get(column), column)
+    return event
+
+
+def _load_batch(rows: list, rollup: Counter) -> int:
+    stmt = (
+        dialect_insert(AdEvent.__table__)
+        .on_conflict_do_nothing(index_elements=['event_id'])
+        .returning(AdEvent.event_type, AdEvent.placement, AdEvent.created_at)
+    )
+    # 이미 적재된 event_id는 RETURNING에 나오지 않으므로 재처리해도 롤업이 중복 집계되지 않는다.
+    inserted = 0
+    for event_type, placement, created_at in db.session.execute(stmt, rows):
+        hour = created_at.replace(minute=0, second=0, microsecond=0)
+        rollup[(hour, placement or '', event_type)] += 1
+        inserted += 1
+    return inserted
+
+
+def _flush_rollup(rollup: Counter):
+    upsert_increment(
+        AdEventHourly.__table__,
+        [
+            {'hour': hour, 'placement': placement, 'event_type': event_type, 'count': count}
+            for (hour, placement, event_type), count in rollup.items()
+        ],
+        key_columns=['hour', 'placement', 'event_type'],
+        increment_columns=['count'],
+    )
+    rollup.clear()
+
+
+def _commit_batch(entries: list, rollup: Counter, rejected: list) -> int:
+    """(원래 줄, 행) 묶음을 적재하고 커밋한다.
+
+    배치가 DB 오류로 실패하면 한 줄씩 다시 넣어 실패한 줄만 rejected에 모은다.
+    연결 오류(OperationalError)는 행의 문제가 아니므로 그대로 올려 세그먼트를 다음 실행으로 넘긴다.
+    """
+    try:
+        inserted = _load_batch([row for _, row in entries], rollup)
+        _flush_rollup(rollup)
+        db.session.commit()
+        return inserted
+    except OperationalError:
+        db.session.rollback()
+        raise
+    except SQLAlchemyError:
+        db.session.rollback()
+        rollup.clear()
+        if len(entries) == 1:
+            logger.warning('rejecting ad event %s', entries[0][1].get('event_id'), exc_info=True)
+            rejected.append(entries[0][0])
+            return 0
+    return sum(_commit_batch([entry], rollup, rejected) for entry in entries)
+
+
+def _compact_segment(claimed: str, rejected_path: str, batch_size: int) -> int:
+    loaded = 0
+    rollup = Counter()
+    batch, rejected = [], []
+    with open(claimed, encoding='utf-8', errors='replace') as fp:
+        for line in fp:
+            if not line.strip():
+                continue
+            row = _parse_line(line)
+            if row is None:
+                rejected.append(line)
+                continue
+            batch.append((line, row))
+            if len(batch) >= batch_size:
+                loaded += _commit_batch(batch, rollup, rejected)
+                batch = []
+    if batch:
+        loaded += _commit_batch(batch, rollup, rejected)
+    if rejected:
+        logger.warning('moved %d ad event lines from %s to %s', len(rejected), claimed, rejected_path)
+        with open(rejected_path, 'a', encoding='utf-8') as fp:
+            fp.writelines(line if line.endswith('\n') else line + '\n' for line in rejected)
+    return loaded
+
+
+def compact_segments(segment_dir: str, batch_size: int = 5000, stale_after: float = 600) -> int:
+    """봉인된 세그먼트를 batch_size 행 단위로 ad_events에 적재하고 시간별 롤업을 갱신한다.
+
+    배치마다 이벤트와 롤업을 같은 트랜잭션으로 커밋하며, 처리가 끝난 세그먼트는 삭제한다.
+    적재할 수 없는 줄은 .ndjson.rejected로, 처리 중 오류가 난 세그먼트는 .ndjson.failed로 옮기고
+    다음 세그먼트를 계속 처리한다. 적재한 이벤트 수를 돌려준다.
+    """
+    if not os.path.isdir(segment_dir):
+        return 0
+
+    loaded = 0
+    for path in _claimable_segments(segment_dir, stale_after):
+        base = path
+        for suffix in (COMPACTING_SUFFIX, OPEN_SUFFIX, SEALED_SUFFIX):
+            if base.endswith(suffix):
+                base = base[:-len(suffix)]
+                break
+        claimed = base + COMPACTING_SUFFIX
+        try:
+            os.replace(path, claimed)
+        except FileNotFoundError:
+            continue
+
+        try:
+            loaded += _compact_segment(claimed, base + REJECTED_SUFFIX, batch_size)
+        except OperationalError:
+            raise  # DB에 닿지 않으면 남은 세그먼트도 실패하므로 멈추고, .compacting은 다음 실행이 다시 집는다.
+        except Exception:
+            db.session.rollback()
+            logger.exception('ad event segment %s failed, moving it aside', claimed)
+            os.replace(claimed, base + FAILED_SUFFIX)
+            continue
+        os.remove(claimed)
+    return loaded
+
+
+def init_app(app):
+    log = AdEventLog(app)
+    app.extensions['ad_event_log'] = log
+    atexit.register(log.stop)
+    return log
@@ -0,0 +1,55 @@
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    """크기 제한(LRU)과 만료 시간(TTL)을 함께 갖는 스레드 안전 캐시."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING:
+                return default
+            expires, value = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl: float = None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        with self._lock:
+            entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_or_set(self, key, factory, ttl: float = None):
+        """캐시에 없으면 factory()로 만들어 저장한다. 동시 미스 시 factory가 중복 호출될 수 있다."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
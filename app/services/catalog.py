@@ -0,0 +1,74 @@
+import hashlib
+import json
+import threading
+import time
+
+from flask import current_app
+
+from ..extensions import db
+from ..models.shop import ShopProduct
+from .cache import TTLCache
+
+_lock = threading.Lock()
+_cache: TTLCache = None
+_version = {'value': None, 'expires': 0.0, 'bump': 0}
+
+
+def _get_cache() -> TTLCache:
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = TTLCache(
+                    maxsize=current_app.config.get('CATALOG_CACHE_MAXSIZE', 2048),
+                    ttl=current_app.config.get('CATALOG_CACHE_TTL', 300),
+                )
+    return _cache
+
+
+def catalog_version() -> str:
+    """max(updated_at)에서 파생한 카탈로그 버전. CATALOG_VERSION_TTL 초 동안 재사용한다."""
+    now = time.monotonic()
+    with _lock:
+        if _version['value'] is not None and _version['expires'] > now:
+            return _version['value']
+        bump = _version['bump']
+
+    latest = db.session.query(db.func.max(ShopProduct.updated_at)).scalar()
+    value = f"{latest.isoformat() if latest else '0'}:{bump}"
+    with _lock:
+        if _version['bump'] == bump:
+            _version['value'] = value
+            _version['expires'] = now + current_app.config.get('CATALOG_VERSION_TTL', 5)
+    return value
+
+
+def bump_catalog_version():
+    """이 프로세스의 카탈로그 캐시를 즉시 무효화한다. (다른 프로세스는 updated_at으로 따라온다)"""
+    with _lock:
+        _version['bump'] += 1
+        _version['value'] = None
+
+
+def compute_etag(payload) -> str:
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(',', ':'), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+def cached(kind: str, key: tuple, build):
+    """현재 카탈로그 버전 기준 read-through 캐시.
+
+    build()는 (payload, status)를 돌려주고, 결과는 (payload, status, etag)로 저장된다.
+    """
+    full_key = (catalog_version(), kind) + tuple(key)
+
+    def _build():
+        payload, status = build()
+        return payload, status, compute_etag(payload) if status == 200 else None
+
+    return _get_cache().get_or_set(full_key, _build)
+
+
+def cached_value(kind: str, key: tuple, build):
+    """ETag가 필요 없는 값(목록 total 등)을 카탈로그 버전 기준으로 캐시한다."""
+    return _get_cache().get_or_set((catalog_version(), kind) + tuple(key), build)
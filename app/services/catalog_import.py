@@ -0,0 +1,180 @@
+import csv
+import json
+import math
+from datetime import datetime
+from itertools import islice
+
+from ..extensions import db
+from ..models.shop import ShopProduct
+from .catalog import bump_catalog_version
+from .sql import dialect_insert
+
+REQUIRED_FIELDS = ('external_id', 'title', 'category', 'price', 'partners_url')
+# 피드 필드 -> 값 종류. 피드에 없는 필드는 NULL(is_recommended는 False)로 적재한다.
+_STR = 'str'
+_INT = 'int'
+_FLOAT = 'float'
+_BOOL = 'bool'
+FIELDS = {
+    'title': _STR,
+    'subtitle': _STR,
+    'detail_description': _STR,
+    'category': _STR,
+    'tag': _STR,
+    'price': _INT,
+    'discount_rate': _INT,
+    'rating': _FLOAT,
+    'review_count': _INT,
+    'is_recommended': _BOOL,
+    'thumb_url': _STR,
+    'icon_bg_color': _STR,
+    'partners_url': _STR,
+}
+_DEACTIVATE_CHUNK = 1000
+# 컬럼 크기를 넘는 값은 Postgres에서 DataError로 배치 전체를 실패시키므로 parse_row에서 거른다.
+_MAX_LENGTHS = {
+    column.name: column.type.length
+    for column in ShopProduct.__table__.columns
+    if getattr(column.type, 'length', None)
+}
+_INT_MIN, _INT_MAX = -2 ** 31, 2 ** 31 - 1  # Integer 컬럼(Postgres integer) 범위
+
+
+class FeedError(ValueError):
+    """처리할 수 없는 피드 행."""
+
+
+def _convert(kind, value):
+    if value is None or (isinstance(value, str) and value.strip() == ''):
+        return False if kind == _BOOL else None
+    if kind == _INT:
+        return int(float(value)) if isinstance(value, str) else int(value)
+    if kind == _FLOAT:
+        return float(value)
+    if kind == _BOOL:
+        if isinstance(value, bool):
+            return value
+        return str(value).strip().lower() in ('1', 'true', 'y', 'yes')
+    return str(value).strip()
+
+
+def parse_row(raw: dict, source: str) -> dict:
+    """피드 한 행을 shop_products 컬럼 dict로 바꾼다. 잘못된 행은 FeedError."""
+    if isinstance(raw, FeedError):
+        raise raw
+    if not isinstance(raw, dict):
+        raise FeedError(f'expected an object, got {type(raw).__name__}')
+    missing = [name for name in REQUIRED_FIELDS if raw.get(name) in (None, '')]
+    if missing:
+        raise FeedError(f"missing {', '.join(missing)}")
+    row = {'source': source, 'external_id': str(raw['external_id']).strip(), 'is_active': True}
+    try:
+        for name, kind in FIELDS.items():
+            row[name] = _convert(kind, raw.get(name))
+    except (TypeError, ValueError, OverflowError) as exc:
+        raise FeedError(str(exc)) from exc
+
+    for name, value in row.items():
+        if value is None:
+            continue
+        kind = FIELDS.get(name, _STR)
+        if kind == _STR and name in _MAX_LENGTHS and len(value) > _MAX_LENGTHS[name]:
+            raise FeedError(f'{name} is longer than {_MAX_LENGTHS[name]} characters')
+        if kind == _INT and not _INT_MIN <= value <= _INT_MAX:
+            raise FeedError(f'{name} is out of range')
+        if kind == _FLOAT and not math.isfinite(value):
+            raise FeedError(f'{name} must be a finite number')
+    return row
+
+
+def read_feed(path: str, fmt: str = None):
+    """CSV 또는 JSON Lines 피드를 한 행씩 dict로 읽는다. 파일 전체를 메모리에 올리지 않는다.
+
+    JSON으로 읽을 수 없는 줄은 FeedError를 그 자리에 내보내 parse_row에서 다른 잘못된 행처럼 건너뛰게 한다.
+    """
+    fmt = fmt or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as exc:
+                    yield FeedError(f'invalid json: {exc.msg}')
+
+
+def _upsert(rows: list, now: datetime):
+    table = ShopProduct.__table__
+    stmt = dialect_insert(table)
+    compared = list(FIELDS) + ['is_active']
+    changed = db.or_(*[table.c[name].is_distinct_from(stmt.excluded[name]) for name in compared])
+    # 내용이 같은 행은 UPDATE하지 않으므로 updated_at(카탈로그 버전)도 그대로 남는다.
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['source', 'external_id'],
+        set_={**{name: stmt.excluded[name] for name in compared}, 'updated_at': now},
+        where=changed,
+    )
+    db.session.execute(stmt, [{**row, 'created_at': now, 'updated_at': now} for row in rows])
+
+
+def _deactivate_missing(source: str, seen: set, now: datetime) -> int:
+    active = [
+        (product_id, external_id) for product_id, external_id in db.session.query(
+            ShopProduct.id, ShopProduct.external_id,
+        ).filter(
+            ShopProduct.source == source,
+            ShopProduct.external_id.isnot(None),
+            ShopProduct.is_active.is_(True),
+        )
+    ]
+    missing = [product_id for product_id, external_id in active if external_id not in seen]
+    for start in range(0, len(missing), _DEACTIVATE_CHUNK):
+        chunk = missing[start:start + _DEACTIVATE_CHUNK]
+        db.session.execute(
+            db.update(ShopProduct).where(ShopProduct.id.in_(chunk)).values(is_active=False, updated_at=now)
+        )
+    db.session.commit()
+    return len(missing)
+
+
+def import_feed(records, source: str, batch_size: int = 1000, deactivate_missing: bool = True, on_error=None) -> dict:
+    """피드 레코드를 (source, external_id) 기준으로 배치 upsert한다.
+
+    배치마다 커밋하므로 중간에 실패해도 다시 실행하면 이어서 맞춰진다.
+    피드에 없는 활성 상품은 마지막에 비활성화하며, 유효한 행이 하나도 없으면 건너뛴다.
+    """
+    stats = {'processed': 0, 'skipped': 0, 'deactivated': 0}
+    seen = set()
+    records = iter(records)
+    line = 0
+
+    while True:
+        raw_batch = list(islice(records, batch_size))
+        if not raw_batch:
+            break
+        batch = {}
+        for raw in raw_batch:
+            line += 1
+            try:
+                row = parse_row(raw, source)
+            except FeedError as exc:
+                stats['skipped'] += 1
+                if on_error:
+                    on_error(line, exc)
+                continue
+            batch[row['external_id']] = row  # 같은 배치 안의 중복은 마지막 값을 쓴다.
+        if batch:
+            # 배치마다 시각을 새로 잡아 카탈로그 버전(max(updated_at))이 커밋마다 앞으로 가게 한다.
+            _upsert(list(batch.values()), datetime.utcnow())
+            db.session.commit()
+            seen.update(batch)
+            stats['processed'] += len(batch)
+
+    if deactivate_missing and seen:
+        stats['deactivated'] = _deactivate_missing(source, seen, datetime.utcnow())
+    bump_catalog_version()
+    return stats
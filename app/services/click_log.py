@@ -0,0 +1,238 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+
+from ..extensions import db
+from ..models.shop import ShopClickLog
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class ClickLogWriter:
+    """상품 클릭 로그를 메모리 큐에 모아 다중 행 INSERT로 적재하는 백그라운드 writer.
+
+    - 큐가 CLICK_LOG_BATCH_SIZE 만큼 차거나 CLICK_LOG_FLUSH_INTERVAL 초가 지나면 적재한다.
+    - 큐가 가득 차면 잠시 기다린 뒤(backpressure) 그래도 자리가 없으면 스풀 파일에 바로 쓴다.
+    - DB 적재에 실패한 배치는 스풀 디렉터리에 NDJSON으로 남기고, 다음 성공 적재 때 재시도한다.
+    - 연결 오류가 아닌 DB 오류로 배치가 실패하면 한 행씩 다시 넣고, 그래도 실패하는 행은
+      .ndjson.rejected 파일로 옮겨 나머지 행과 뒤따르는 스풀 파일을 막지 않게 한다.
+    """
+
+    def __init__(self, app):
+        config = app.config
+        self.app = app
+        self.batch_size = config.get('CLICK_LOG_BATCH_SIZE', 500)
+        self.flush_interval = config.get('CLICK_LOG_FLUSH_INTERVAL', 1.0)
+        self.enqueue_timeout = config.get('CLICK_LOG_ENQUEUE_TIMEOUT', 0.05)
+        self.spool_dir = config.get('CLICK_LOG_SPOOL_DIR')
+        self.replay_stale_after = config.get('CLICK_LOG_REPLAY_STALE_SECONDS', 600)
+        self.is_async = config.get('CLICK_LOG_ASYNC', True)
+        self._queue = queue.Queue(maxsize=config.get('CLICK_LOG_QUEUE_SIZE', 10000))
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def submit(self, user_id, product_id, source, user_agent, out_url):
+        event = {
+            'user_id': user_id,
+            'product_id': product_id,
+            'source': source,
+            'user_agent': user_agent,
+            'out_url': out_url,
+            'created_at': datetime.utcnow(),
+        }
+        if not self.is_async:
+            self._write([event])
+            return
+
+        self._ensure_started()
+        try:
+            self._queue.put(event, timeout=self.enqueue_timeout)
+        except queue.Full:
+            logger.warning('click log queue full, spooling event to disk')
+            self._spool([event])
+
+    def flush(self):
+        """큐에 남은 이벤트를 호출한 스레드에서 바로 적재한다."""
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+        for start in range(0, len(batch), self.batch_size):
+            self._write(batch[start:start + self.batch_size])
+
+    def stop(self, timeout: float = 10.0):
+        thread = self._thread
+        if thread is not None and thread.is_alive() and self._pid == os.getpid():
+            self._queue.put(_STOP)
+            thread.join(timeout)
+        self._thread = None
+        self.flush()
+
+    def _ensure_started(self):
+        # gunicorn preload 등으로 fork된 경우 자식 프로세스에서 스레드를 새로 띄운다.
+        if self._thread is not None and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='click-log-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if item is _STOP:
+                break
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                self._write(batch)
+                batch = []
+                deadline = None
+
+        if batch:
+            self._write(batch)
+
+    def _write(self, rows):
+        with self.app.app_context():
+            retry, rejected = self._insert(rows)
+            if rejected:
+                self._reject(rejected)
+            if retry:
+                self._spool(retry)
+                return
+            self._replay_spool()
+
+    def _insert(self, rows):
+        """rows를 적재하고 (나중에 다시 시도할 행, 버릴 행)을 돌려준다. (app context 안에서 호출)
+
+        연결 오류면 남은 행 전부를 다시 시도할 행으로 돌려준다. 그 밖의 DB 오류는 행 자체의 문제일 수
+        있으므로 한 행씩 다시 넣어 실패하는 행만 골라낸다.
+        """
+        try:
+            db.session.execute(ShopClickLog.__table__.insert(), rows)
+            db.session.commit()
+            return [], []
+        except OperationalError:
+            db.session.rollback()
+            logger.exception('click log insert failed, spooling %d events', len(rows))
+            return rows, []
+        except SQLAlchemyError:
+            db.session.rollback()
+            if len(rows) == 1:
+                logger.warning('rejecting click event %r', rows[0], exc_info=True)
+                return [], rows
+        rejected = []
+        for index, row in enumerate(rows):
+            retry, bad = self._insert([row])
+            if retry:
+                return rows[index:], rejected
+            rejected.extend(bad)
+        return [], rejected
+
+    def _spool(self, rows, suffix: str = '.ndjson'):
+        if not self.spool_dir:
+            logger.error('CLICK_LOG_SPOOL_DIR is not set, dropping %d click events', len(rows))
+            return
+        os.makedirs(self.spool_dir, exist_ok=True)
+        name = f'clicks-{time.time_ns()}-{os.getpid()}-{threading.get_ident()}{suffix}'
+        tmp_path = os.path.join(self.spool_dir, name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as fp:
+            for row in rows:
+                fp.write(json.dumps({**row, 'created_at': row['created_at'].isoformat()}, default=str) + '\n')
+        os.replace(tmp_path, os.path.join(self.spool_dir, name))
+
+    def _reject(self, rows):
+        # .ndjson.rejected는 재적재 대상이 아니다. 원인을 고친 뒤 .ndjson으로 바꾸면 다시 적재된다.
+        logger.error('moving %d click events that cannot be inserted aside', len(rows))
+        self._spool(rows, '.ndjson.rejected')
+
+    def _replay_spool(self, max_files: int = 10):
+        """스풀 파일을 오래된 순서로 최대 max_files개까지 DB에 다시 적재한다. (app context 안에서 호출)
+
+        적재 중 프로세스가 죽어 남은 .replay 파일은 CLICK_LOG_REPLAY_STALE_SECONDS가 지나면 다시 가져온다.
+        연결 오류가 나면 파일을 되돌려 놓고 멈추고, 적재할 수 없는 행만 있는 파일은 건너뛰고 계속한다.
+        """
+        if not self.spool_dir or not os.path.isdir(self.spool_dir):
+            return
+        now = time.time()
+        names = []
+        for name in sorted(os.listdir(self.spool_dir)):
+            if name.endswith('.ndjson'):
+                names.append(name)
+            elif name.endswith('.ndjson.replay'):
+                claimed = os.path.join(self.spool_dir, name)
+                try:
+                    stale = now - os.path.getmtime(claimed) > self.replay_stale_after
+                except FileNotFoundError:
+                    continue
+                if stale:
+                    names.append(name[:-len('.replay')])
+                    try:
+                        os.replace(claimed, os.path.join(self.spool_dir, names[-1]))
+                    except FileNotFoundError:
+                        names.pop()
+        for name in sorted(names)[:max_files]:
+            path = os.path.join(self.spool_dir, name)
+            claimed = path + '.replay'
+            try:
+                os.replace(path, claimed)  # 다른 프로세스와 같은 파일을 중복 적재하지 않도록 선점
+                os.utime(claimed)  # 선점 시각. 오래된 .replay만 다시 가져가도록 mtime을 갱신한다.
+            except FileNotFoundError:
+                continue
+            rows = []
+            with open(claimed, encoding='utf-8') as fp:
+                for line in fp:
+                    if not line.strip():
+                        continue
+                    try:
+                        row = json.loads(line)
+                        row['created_at'] = datetime.fromisoformat(row['created_at'])
+                    except (ValueError, TypeError, KeyError):
+                        logger.warning('skipping malformed click spool line in %s', name)
+                        continue
+                    rows.append(row)
+            retry, rejected = self._insert(rows) if rows else ([], [])
+            if rejected:
+                self._reject(rejected)
+            if retry:
+                if len(retry) == len(rows):
+                    os.replace(claimed, path)
+                else:
+                    os.remove(claimed)
+                    self._spool(retry)
+                logger.warning('click log spool replay stopped at %s', name)
+                return
+            os.remove(claimed)
+
+
+def init_app(app):
+    writer = ClickLogWriter(app)
+    app.extensions['click_log_writer'] = writer
+    atexit.register(writer.stop)
+    return writer
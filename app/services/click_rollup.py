@@ -0,0 +1,168 @@
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from ..extensions import db
+from ..models.jobs import JobWatermark
+from ..models.shop import ShopClickHourly, ShopClickLog, ShopProduct
+from .sql import dialect_insert, upsert_increment
+
+WATERMARK_NAME = 'shop_click_hourly'
+GAP_NAME = 'shop_click_hourly_gap'  # 워터마크 바로 뒤의 id 빈틈을 처음 본 시각
+POPULARITY_NAME = 'shop_popularity'  # 인기 점수가 바뀔 때마다 올라가는 세대 번호
+
+_popularity_lock = threading.Lock()
+_popularity = {'value': None, 'expires': 0.0}
+
+
+def _hour(value: datetime) -> datetime:
+    return value.replace(minute=0, second=0, microsecond=0)
+
+
+def _window_start(hours: int) -> datetime:
+    """현재 시간 버킷을 포함해 최근 hours개 버킷의 시작 시각."""
+    return _hour(datetime.utcnow()) - timedelta(hours=hours - 1)
+
+
+def _watermark(name: str = WATERMARK_NAME) -> JobWatermark:
+    """워터마크 행을 잠그고 돌려준다. 동시에 두 작업이 같은 구간을 집계하지 않게 한다."""
+    db.session.execute(
+        dialect_insert(JobWatermark.__table__)
+        .values(name=name, value=0, updated_at=datetime.utcnow())
+        .on_conflict_do_nothing(index_elements=['name'])
+    )
+    return (
+        db.session.query(JobWatermark)
+        .filter(JobWatermark.name == name)
+        .with_for_update()
+        .one()
+    )
+
+
+def _gap_expired(start_id: int, wait_seconds: int) -> bool:
+    """start_id에서 시작하는 id 빈틈을 wait_seconds 넘게 기다렸으면 True.
+
+    처음 본 빈틈이면 (시작 id, 처음 본 시각)을 GAP_NAME 행에 남기고 False. 집계와 같은 트랜잭션으로 커밋된다.
+    """
+    now = datetime.utcnow()
+    gap = _watermark(GAP_NAME)
+    if gap.value != start_id:
+        gap.value = start_id
+        gap.updated_at = now
+        return False
+    return gap.updated_at <= now - timedelta(seconds=wait_seconds)
+
+
+def rollup_batch(batch_size: int, gap_wait_seconds: int, lookback_hours: int = 48) -> int:
+    """워터마크 이후의 클릭을 id가 빈틈없이 이어지는 데까지 최대 batch_size건 집계하고 처리한 건수를 돌려준다.
+
+    id는 INSERT 때 받지만 커밋은 그보다 늦을 수 있어, 작은 id가 큰 id보다 늦게 보이기도 한다
+    (스풀에서 재적재된 클릭, 동시에 커밋 중인 배치). 그래서 빈틈 앞에서 멈추고, 빈틈이 gap_wait_seconds 동안
+    채워지지 않으면 롤백으로 버려진 id로 보고 건너뛴다. 집계와 워터마크 갱신은 한 트랜잭션에서 커밋된다.
+
+    shop_click_logs가 월 파티션이면 created_at 조건이 있어야 최근 파티션만 읽는다. 워터마크가 마지막으로
+    움직인 시각보다 lookback_hours 이전에 만들어진 클릭은 보지 않으므로, 그보다 늦게 적재된 클릭은 빈틈으로
+    취급되어 집계에서 빠진다.
+    """
+    mark = _watermark()
+    query = (
+        db.session.query(ShopClickLog.id, ShopClickLog.product_id, ShopClickLog.source, ShopClickLog.created_at)
+        .filter(ShopClickLog.id > mark.value)
+    )
+    if mark.value:
+        query = query.filter(ShopClickLog.created_at >= mark.updated_at - timedelta(hours=lookback_hours))
+    rows = query.order_by(ShopClickLog.id).limit(batch_size).all()
+
+    counts = Counter()
+    last_id = mark.value
+    for row in rows:
+        if row.id != last_id + 1 and not _gap_expired(last_id + 1, gap_wait_seconds):
+            break
+        counts[(_hour(row.created_at), row.product_id, row.source or '')] += 1
+        last_id = row.id
+
+    if not counts:
+        db.session.commit()  # 새로 본 빈틈의 기록만 남긴다.
+        return 0
+
+    upsert_increment(
+        ShopClickHourly.__table__,
+        [
+            {'hour': hour, 'product_id': product_id, 'source': source, 'count': n}
+            for (hour, product_id, source), n in counts.items()
+        ],
+        key_columns=['hour', 'product_id', 'source'],
+        increment_columns=['count'],
+    )
+    mark.value = last_id
+    db.session.commit()
+    return sum(counts.values())
+
+
+def rollup(batch_size: int, gap_wait_seconds: int, lookback_hours: int = 48) -> int:
+    """밀린 클릭이 없어질 때까지 rollup_batch를 반복한다."""
+    total = 0
+    while True:
+        processed = rollup_batch(batch_size, gap_wait_seconds, lookback_hours)
+        total += processed
+        if processed < batch_size:
+            return total
+
+
+def refresh_popularity(window_hours: int) -> int:
+    """shop_products.popularity_score를 최근 window_hours 동안의 클릭 수로 갱신한다.
+
+    값이 바뀐 상품만 UPDATE하며, 카탈로그 버전이 흔들리지 않도록 updated_at은 그대로 둔다.
+    대신 바뀐 상품이 있으면 인기 세대 번호를 올려 popular 정렬 캐시만 새로 만들게 한다.
+    """
+    since = _window_start(window_hours)
+    clicks = db.func.coalesce(
+        db.select(db.func.sum(ShopClickHourly.count))
+        .where(ShopClickHourly.product_id == ShopProduct.id, ShopClickHourly.hour >= since)
+        .scalar_subquery(),
+        0,
+    )
+    result = db.session.execute(
+        db.update(ShopProduct)
+        .where(ShopProduct.popularity_score != clicks)
+        .values(popularity_score=clicks, updated_at=ShopProduct.updated_at)
+    )
+    if result.rowcount:
+        generation = _watermark(POPULARITY_NAME)
+        generation.value += 1
+        generation.updated_at = datetime.utcnow()
+    db.session.commit()
+    return result.rowcount
+
+
+def popularity_version():
+    """인기 세대 번호. CATALOG_VERSION_TTL 초 동안 재사용한다."""
+    now = time.monotonic()
+    with _popularity_lock:
+        if _popularity['value'] is not None and _popularity['expires'] > now:
+            return _popularity['value']
+    value = db.session.query(JobWatermark.value).filter(JobWatermark.name == POPULARITY_NAME).scalar() or 0
+    with _popularity_lock:
+        _popularity['value'] = value
+        _popularity['expires'] = now + current_app.config.get('CATALOG_VERSION_TTL', 5)
+    return value
+
+
+def top_products(hours: int, limit: int, source: str = None) -> list:
+    """최근 hours 시간 동안 클릭이 많은 활성 상품 [(product_id, clicks)]."""
+    filters = [ShopClickHourly.hour >= _window_start(hours), ShopProduct.is_active.is_(True)]
+    if source is not None:
+        filters.append(ShopClickHourly.source == source)
+    clicks = db.func.sum(ShopClickHourly.count).label('clicks')
+    query = (
+        db.session.query(ShopClickHourly.product_id, clicks)
+        .join(ShopProduct, ShopProduct.id == ShopClickHourly.product_id)
+        .filter(*filters)
+        .group_by(ShopClickHourly.product_id)
+        .order_by(clicks.desc(), ShopClickHourly.product_id.desc())
+        .limit(limit)
+    )
+    return [(row.product_id, int(row.clicks)) for row in query]
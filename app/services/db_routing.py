@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from functools import wraps
+
+from flask import current_app, g, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+from sqlalchemy.sql.dml import UpdateBase
+
+from .metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+REPLICA_BIND = 'replica'
+
+REPLICA_FALLBACKS = REGISTRY.counter(
+    'db_replica_fallbacks_total', '복제본 대신 주 DB로 읽은 헬스 체크 결과 수.', ['reason'],
+)
+
+# 복제본이 WAL을 모두 재생했으면 지연 0, 아니면 마지막 재생 트랜잭션 이후 경과 시간(초)
+_PG_LAG_SQL = """
+SELECT CASE
+    WHEN NOT pg_is_in_recovery() THEN 0
+    WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+    ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+END
+"""
+
+
+class ReplicaMonitor:
+    """복제본 상태를 주기적으로 확인한다. 확인은 요청 스레드 하나가 맡고 나머지는 직전 결과를 쓴다."""
+
+    def __init__(self, max_lag: float, interval: float):
+        self.max_lag = max_lag
+        self.interval = interval
+        self._healthy = False
+        self._checked_at = None
+        self._watched = set()
+        self._lock = threading.Lock()
+
+    def healthy(self, engine) -> bool:
+        if id(engine) not in self._watched:
+            self._watched.add(id(engine))
+            event.listen(engine, 'handle_error', self._on_error)
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.interval:
+            return self._healthy
+        if not self._lock.acquire(blocking=False):
+            return self._healthy
+        try:
+            self._healthy = self._check(engine)
+            self._checked_at = time.monotonic()
+        finally:
+            self._lock.release()
+        return self._healthy
+
+    def _check(self, engine) -> bool:
+        try:
+            with engine.connect() as conn:
+                if engine.dialect.name == 'postgresql':
+                    lag = float(conn.exec_driver_sql(_PG_LAG_SQL).scalar() or 0)
+                else:
+                    conn.exec_driver_sql('SELECT 1')
+                    lag = 0.0
+        except Exception:
+            logger.warning('replica health check failed, reading from primary', exc_info=True)
+            REPLICA_FALLBACKS.inc('error')
+            return False
+        if lag > self.max_lag:
+            logger.warning('replica lag %.1fs exceeds %.1fs, reading from primary', lag, self.max_lag)
+            REPLICA_FALLBACKS.inc('lag')
+            return False
+        return True
+
+    def _on_error(self, context):
+        # 연결이 끊긴 복제본은 다음 확인 주기까지 쓰지 않는다.
+        if context.is_disconnect:
+            REPLICA_FALLBACKS.inc('disconnect')
+            self._healthy = False
+            self._checked_at = time.monotonic()
+
+
+def _is_write(session, clause) -> bool:
+    if session._flushing or session.new or session.dirty or session.deleted:
+        return True
+    if isinstance(clause, UpdateBase):
+        return True
+    return getattr(clause, '_for_update_arg', None) is not None
+
+
+class RoutingSession(Session):
+    """read_only 뷰의 조회는 복제본으로, 그 밖의 모든 실행은 주 DB로 보낸다.
+
+    같은 요청에서 쓰기(flush, INSERT/UPDATE/DELETE, FOR UPDATE)가 한 번이라도 일어나면
+    그 뒤의 조회도 주 DB로 고정해 방금 쓴 값을 읽게 한다.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context() and g.get('_db_read_only'):
+            if g.get('_db_primary_pinned') or _is_write(self, clause):
+                g._db_primary_pinned = True
+            else:
+                replica = self._db.engines.get(REPLICA_BIND)
+                monitor = current_app.extensions.get('db_routing')
+                if replica is not None and monitor is not None and monitor.healthy(replica):
+                    return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only(view):
+    """뷰의 조회를 복제본으로 보낸다. 복제본이 없거나 비정상이면 주 DB를 쓴다."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g._db_read_only = True
+        return view(*args, **kwargs)
+    return wrapper
+
+
+def init_app(app):
+    """REPLICA_DATABASE_URL이 있으면 'replica' bind로 등록한다. db.init_app보다 먼저 불러야 한다."""
+    url = app.config.get('REPLICA_DATABASE_URL')
+    if not url:
+        return
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    binds.setdefault(REPLICA_BIND, url)
+    app.config['SQLALCHEMY_BINDS'] = binds
+    app.extensions['db_routing'] = ReplicaMonitor(
+        max_lag=app.config.get('REPLICA_MAX_LAG_SECONDS', 5),
+        interval=app.config.get('REPLICA_HEALTH_INTERVAL', 5),
+    )
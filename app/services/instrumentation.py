@@ -0,0 +1,110 @@
+import logging
+import time
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .metrics import REGISTRY
+
+slow_query_logger = logging.getLogger('app.slow_query')
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds', '요청 처리 시간(초).', ['endpoint', 'method'],
+)
+REQUESTS_TOTAL = REGISTRY.counter(
+    'http_requests_total', '응답 수.', ['endpoint', 'method', 'status'],
+)
+REQUEST_QUERIES = REGISTRY.histogram(
+    'db_queries_per_request', '요청당 SQL 실행 수.', ['endpoint'],
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+REQUEST_SQL_SECONDS = REGISTRY.histogram(
+    'db_time_per_request_seconds', '요청당 SQL 실행 시간 합계(초).', ['endpoint'],
+)
+
+# 엔진 이벤트는 앱 컨텍스트 밖(백그라운드 스레드)에서도 불리므로 설정값을 모듈에 둔다.
+_settings = {'slow_query_ms': None, 'max_param_chars': 1000, 'debug_headers': False}
+_listening = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_start'].pop()
+    elapsed = time.perf_counter() - started
+
+    if has_request_context():
+        stats = g.get('_instrumentation')
+        if stats is not None:
+            stats['queries'] += 1
+            stats['sql_seconds'] += elapsed
+
+    threshold = _settings['slow_query_ms']
+    if threshold is not None and elapsed * 1000 >= threshold:
+        params = repr(parameters)
+        if len(params) > _settings['max_param_chars']:
+            params = params[:_settings['max_param_chars']] + '...'
+        slow_query_logger.warning(
+            'slow query %.1fms endpoint=%s statement=%s parameters=%s',
+            elapsed * 1000,
+            request.endpoint if has_request_context() else None,
+            statement,
+            params,
+        )
+
+
+def _handle_error(context):
+    # 실패한 실행은 after_cursor_execute가 불리지 않으므로 시작 시각을 버린다.
+    conn = context.connection
+    if conn is not None and conn.info.get('query_start'):
+        conn.info['query_start'].pop()
+
+
+def _start_request():
+    g._instrumentation = {'started': time.perf_counter(), 'queries': 0, 'sql_seconds': 0.0}
+
+
+def _finish_request(response):
+    stats = g.pop('_instrumentation', None)
+    if stats is None:
+        return response
+    elapsed = time.perf_counter() - stats['started']
+    endpoint = request.endpoint or 'unknown'
+
+    REQUEST_SECONDS.observe(elapsed, endpoint, request.method)
+    REQUESTS_TOTAL.inc(endpoint, request.method, str(response.status_code))
+    REQUEST_QUERIES.observe(stats['queries'], endpoint)
+    REQUEST_SQL_SECONDS.observe(stats['sql_seconds'], endpoint)
+
+    if _settings['debug_headers']:
+        response.headers['X-DB-Query-Count'] = str(stats['queries'])
+        response.headers['X-DB-Time-Ms'] = f"{stats['sql_seconds'] * 1000:.2f}"
+        response.headers['X-Handler-Time-Ms'] = f'{elapsed * 1000:.2f}'
+    return response
+
+
+def metrics_view():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
+def init_app(app):
+    global _listening
+    config = app.config
+    _settings['slow_query_ms'] = config.get('SLOW_QUERY_MS')
+    _settings['max_param_chars'] = config.get('SLOW_QUERY_MAX_PARAM_CHARS', 1000)
+    _settings['debug_headers'] = config.get('INSTRUMENTATION_HEADERS', app.debug)
+
+    if not _listening:
+        # 주/복제본 등 모든 엔진에 적용되도록 Engine 클래스에 건다.
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        _listening = True
+
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+    if config.get('METRICS_ENABLED', True):
+        app.add_url_rule('/metrics', 'metrics', metrics_view)
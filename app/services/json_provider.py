@@ -0,0 +1,45 @@
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # 선택 의존성
+    orjson = None
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """orjson 기반 JSON provider.
+
+    dumps/loads에 추가 인자(sort_keys, indent 등)가 오면 표준 json 구현으로 처리한다.
+    datetime은 Flask 기본(HTTP 날짜)과 달리 ISO 8601 문자열로 직렬화된다.
+    """
+
+    option = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        if kwargs:
+            return super().dumps(obj, **kwargs)
+        return orjson.dumps(obj, default=self.default, option=self.option).decode()
+
+    def loads(self, s, **kwargs):
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        option = self.option
+        if self.compact is None and self._app.debug:
+            option |= orjson.OPT_INDENT_2
+        data = orjson.dumps(obj, default=self.default, option=option | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(data, mimetype=self.mimetype)
+
+
+def init_app(app):
+    """JSON_PROVIDER 설정('auto', 'orjson', 'default')에 맞는 provider를 건다."""
+    choice = app.config.get('JSON_PROVIDER', 'auto')
+    if choice == 'orjson' and orjson is None:
+        raise RuntimeError('JSON_PROVIDER=orjson requires the orjson package')
+    if choice in ('auto', 'orjson') and orjson is not None:
+        app.json = OrjsonProvider(app)
+    else:
+        app.json = DefaultJSONProvider(app)
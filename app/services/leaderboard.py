@@ -0,0 +1,443 @@
+import atexit
+import gzip
+import json
+import logging
+import os
+import random
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+
+from ..extensions import db
+from ..models.points import UserPointLog
+from ..models.sleep import SleepWeeklyStat
+from .db_routing import RoutingSession
+from . import sleep_stats
+
+logger = logging.getLogger(__name__)
+
+METRICS = ('points', 'sleep')  # 주간 획득 포인트, 주간 수면 분
+SNAPSHOT_VERSION = 1
+
+_PENDING_KEY = 'leaderboard_pending'
+_MAX_LEVEL = 32
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, level: int):
+        self.key = key
+        self.next = [None] * level
+        self.width = [1] * level  # next[i]까지 맨 아래 층에서 몇 칸인지
+
+
+class RankedSet:
+    """점수 내림차순으로 정렬된 (member, score) 집합. 인덱스 가능한 skiplist라 갱신·순위·구간 조회가 O(log n).
+
+    정렬 키는 (-score, member)라 점수가 같으면 member(사용자 id)가 작은 쪽이 앞선다. 스레드 안전하지 않다.
+    """
+
+    def __init__(self, seed=None):
+        self._head = _Node(None, _MAX_LEVEL)
+        self._levels = 1  # 지금 쓰는 층 수. 그 위 층은 건너뛴다.
+        self._size = 0
+        self._scores = {}
+        self._random = random.Random(seed)
+
+    @classmethod
+    def from_scores(cls, scores: dict, seed=None) -> 'RankedSet':
+        """{member: score}로 한 번에 만든다. 정렬 한 번과 선형 연결이라 하나씩 넣는 것보다 훨씬 빠르다."""
+        ranked = cls(seed)
+        last = [ranked._head] * _MAX_LEVEL
+        last_pos = [0] * _MAX_LEVEL
+        position = 0
+        for position, key in enumerate(sorted((-score, member) for member, score in scores.items()), 1):
+            level = ranked._level()
+            node = _Node(key, level)
+            for i in range(level):
+                last[i].next[i] = node
+                last[i].width[i] = position - last_pos[i]
+                last[i], last_pos[i] = node, position
+            ranked._levels = max(ranked._levels, level)
+        for i in range(ranked._levels):
+            last[i].width[i] = position + 1 - last_pos[i]
+        ranked._size = position
+        ranked._scores = dict(scores)
+        return ranked
+
+    def __len__(self):
+        return len(self._scores)
+
+    def __contains__(self, member):
+        return member in self._scores
+
+    def score(self, member, default=None):
+        return self._scores.get(member, default)
+
+    def items(self):
+        """(member, score)를 순위 순서로."""
+        node = self._head.next[0]
+        while node is not None:
+            yield node.key[1], -node.key[0]
+            node = node.next[0]
+
+    def _level(self) -> int:
+        # 층 수 = 1 + 난수 비트의 뒤쪽 0 개수 (k층 이상일 확률 1/2^(k-1))
+        bits = self._random.getrandbits(_MAX_LEVEL - 1)
+        return (bits & -bits).bit_length() or _MAX_LEVEL
+
+    def _insert(self, key):
+        level = self._level()
+        if level > self._levels:
+            for i in range(self._levels, level):
+                self._head.width[i] = self._size + 1
+            self._levels = level
+        levels = self._levels
+        chain = [None] * levels
+        steps_at = [0] * levels
+        node, steps = self._head, 0
+        for i in reversed(range(levels)):
+            while node.next[i] is not None and node.next[i].key < key:
+                steps += node.width[i]
+                node = node.next[i]
+            chain[i], steps_at[i] = node, steps
+        new = _Node(key, level)
+        for i in range(level):
+            prev = chain[i]
+            new.next[i] = prev.next[i]
+            prev.next[i] = new
+            new.width[i] = prev.width[i] - (steps - steps_at[i])
+            prev.width[i] = steps - steps_at[i] + 1
+        for i in range(level, levels):
+            chain[i].width[i] += 1
+        self._size += 1
+
+    def _remove(self, key):
+        levels = self._levels
+        chain = [None] * levels
+        node = self._head
+        for i in reversed(range(levels)):
+            while node.next[i] is not None and node.next[i].key < key:
+                node = node.next[i]
+            chain[i] = node
+        target = chain[0].next[0]
+        for i in range(len(target.next)):
+            chain[i].width[i] += target.width[i] - 1
+            chain[i].next[i] = target.next[i]
+        for i in range(len(target.next), levels):
+            chain[i].width[i] -= 1
+        self._size -= 1
+
+    def set(self, member, score):
+        old = self._scores.get(member)
+        if old == score:
+            return
+        if old is not None:
+            self._remove((-old, member))
+        self._insert((-score, member))
+        self._scores[member] = score
+
+    def add(self, member, delta):
+        self.set(member, self._scores.get(member, 0) + delta)
+
+    def count_above(self, score) -> int:
+        """score보다 점수가 높은 member 수."""
+        key = (-score, float('-inf'))
+        node, steps = self._head, 0
+        for i in reversed(range(self._levels)):
+            while node.next[i] is not None and node.next[i].key < key:
+                steps += node.width[i]
+                node = node.next[i]
+        return steps
+
+    def rank(self, member):
+        """공동 순위(1224 방식) 기준 1부터 시작하는 순위. 없으면 None."""
+        score = self._scores.get(member)
+        if score is None:
+            return None
+        return self.count_above(score) + 1
+
+    def range(self, offset: int, limit: int) -> list:
+        """순위 순서로 offset번째부터 limit개의 (rank, member, score)."""
+        if offset >= len(self._scores) or limit <= 0:
+            return []
+        node, remaining = self._head, offset + 1
+        for i in reversed(range(self._levels)):
+            while node.next[i] is not None and node.width[i] <= remaining:
+                remaining -= node.width[i]
+                node = node.next[i]
+        result = []
+        position, rank, previous = offset, None, None
+        while node is not None and len(result) < limit:
+            score = -node.key[0]
+            if score != previous:
+                rank = position + 1 if rank is not None else self.count_above(score) + 1
+                previous = score
+            result.append((rank, node.key[1], score))
+            position += 1
+            node = node.next[0]
+        return result
+
+
+class Leaderboards:
+    """지표·주별 RankedSet 묶음. 커밋된 포인트/수면 기록을 바로 반영하고 주기적으로 스냅샷을 남긴다.
+
+    - 처음 쓰일 때 스냅샷(포인트) + 그 이후 원장, sleep_weekly_stats(수면)로 채운다. 스냅샷이 없으면 원장을 집계한다.
+    - 커밋 후 반영은 이 프로세스의 쓰기만 보므로, LEADERBOARD_RESYNC_SECONDS마다 DB에서 다시 만들어
+      다른 워커의 쓰기를 따라잡고 누락된 반영을 바로잡는다. 다시 만드는 일은 요청 스레드 하나가 맡는다.
+    """
+
+    def __init__(self, app):
+        config = app.config
+        self.weeks = max(config.get('LEADERBOARD_WEEKS', 2), 1)
+        self.resync_interval = config.get('LEADERBOARD_RESYNC_SECONDS', 300)
+        self.snapshot_interval = config.get('LEADERBOARD_SNAPSHOT_SECONDS', 60)
+        self.snapshot_path = config.get('LEADERBOARD_SNAPSHOT_PATH')
+        self._boards = {}  # (metric, week_start) -> RankedSet
+        self._lock = threading.Lock()
+        self._maintain_lock = threading.Lock()
+        self._loaded = False
+        self._replay = None  # 다시 만드는 동안 들어온 반영분
+        self._synced_at = None
+        self._snapshot_at = None
+
+    def kept_weeks(self, today: date = None) -> list:
+        """보관하는 주의 시작일(월요일), 최근 주부터."""
+        current = sleep_stats.week_start(today or datetime.utcnow().date())
+        return [current - timedelta(weeks=n) for n in range(self.weeks)]
+
+    # -- 조회 --------------------------------------------------------------
+
+    def top(self, metric: str, week: date, limit: int, offset: int = 0):
+        """(순위 목록 [(rank, user_id, score)], 전체 인원)."""
+        self.maintain()
+        with self._lock:
+            board = self._boards.get((metric, week))
+            if board is None:
+                return [], 0
+            return board.range(offset, limit), len(board)
+
+    def rank(self, metric: str, week: date, user_id: int):
+        """(순위 또는 None, 점수, 전체 인원)."""
+        self.maintain()
+        with self._lock:
+            board = self._boards.get((metric, week))
+            if board is None:
+                return None, 0, 0
+            return board.rank(user_id), board.score(user_id, 0), len(board)
+
+    def sizes(self) -> dict:
+        """{(metric, week_start): 인원}."""
+        with self._lock:
+            return {key: len(board) for key, board in self._boards.items()}
+
+    # -- 반영 --------------------------------------------------------------
+
+    def apply(self, deltas: dict):
+        """{(metric, week_start, user_id): delta}를 더한다. 한 번도 채우기 전이면 채울 때 DB에서 읽히므로 버린다."""
+        if not deltas:
+            return
+        kept = set(self.kept_weeks())
+        with self._lock:
+            if self._replay is not None:
+                self._replay.append(deltas)
+            if self._loaded:
+                self._add(deltas, kept)
+
+    def _add(self, deltas: dict, kept: set):
+        for (metric, week, user_id), delta in deltas.items():
+            if week not in kept or not delta:
+                continue
+            board = self._boards.get((metric, week))
+            if board is None:
+                board = self._boards[(metric, week)] = RankedSet()
+            board.add(user_id, delta)
+
+    # -- 채우기 ------------------------------------------------------------
+
+    def maintain(self):
+        """처음이면 채우고, 주기가 되면 DB에서 다시 만들거나 스냅샷을 쓴다."""
+        if not self._loaded:
+            with self._maintain_lock:
+                if not self._loaded and not self.load_snapshot():
+                    self.rebuild()
+            return
+        now = time.monotonic()
+        resync_due = self.resync_interval and now - self._synced_at >= self.resync_interval
+        snapshot_due = self.snapshot_interval and now - self._snapshot_at >= self.snapshot_interval
+        if not (resync_due or snapshot_due):
+            return
+        if not self._maintain_lock.acquire(blocking=False):
+            return  # 다른 스레드가 하는 중이면 직전 상태로 답한다.
+        try:
+            if resync_due:
+                self.rebuild()
+            else:
+                self.save_snapshot()
+        finally:
+            self._maintain_lock.release()
+
+    def rebuild(self):
+        """원장과 수면 주간 집계로 모든 보드를 다시 만든다."""
+        weeks = self.kept_weeks()
+        with self._lock:
+            self._replay = []
+        try:
+            boards = {}
+            for week in weeks:
+                boards[('points', week)] = _board(_points_between(*_week_bounds(week)))
+            boards.update(_sleep_boards(weeks))
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+        self._swap(boards, set(weeks))
+        self._synced_at = time.monotonic()
+        self.save_snapshot()
+
+    def _swap(self, boards: dict, kept: set):
+        with self._lock:
+            replay, self._replay = self._replay or [], None
+            self._boards = boards
+            for deltas in replay:
+                self._add(deltas, kept)
+            self._loaded = True
+
+    def load_snapshot(self) -> bool:
+        """스냅샷과 그 이후 원장으로 포인트 보드를, 수면 주간 집계로 수면 보드를 채운다. 스냅샷이 없으면 False."""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with gzip.open(self.snapshot_path, 'rt', encoding='utf-8') as fp:
+                snapshot = json.load(fp)
+        except (OSError, ValueError):
+            logger.exception('failed to read leaderboard snapshot %s, rebuilding', self.snapshot_path)
+            return False
+        if snapshot.get('version') != SNAPSHOT_VERSION:
+            return False
+
+        weeks = self.kept_weeks()
+        taken_at = datetime.fromisoformat(snapshot['taken_at'])
+        with self._lock:
+            self._replay = []
+        boards = {}
+        for week in weeks:
+            boards[('points', week)] = _board(snapshot['points'].get(week.isoformat(), []))
+        # 스냅샷 이후 기록된 포인트만 원장에서 더 읽는다.
+        since = max(taken_at, _week_bounds(weeks[-1])[0])
+        for week in weeks:
+            start, end = _week_bounds(week)
+            if end <= since:
+                continue
+            board = boards[('points', week)]
+            for user_id, points in _points_between(max(start, since), end):
+                board.add(user_id, int(points))
+        boards.update(_sleep_boards(weeks))
+        self._swap(boards, set(weeks))
+        self._synced_at = time.monotonic()
+        self._snapshot_at = time.monotonic()
+        return True
+
+    def save_snapshot(self):
+        """포인트 보드를 gzip JSON으로 원자적으로 쓴다. 수면 보드는 sleep_weekly_stats에서 바로 복원된다."""
+        self._snapshot_at = time.monotonic()
+        if not self.snapshot_path or not self._loaded:
+            return
+        with self._lock:
+            taken_at = datetime.utcnow()
+            points = {
+                week.isoformat(): list(board.items())
+                for (metric, week), board in self._boards.items() if metric == 'points'
+            }
+        directory = os.path.dirname(os.path.abspath(self.snapshot_path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{self.snapshot_path}.{os.getpid()}.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as fp:
+            json.dump({'version': SNAPSHOT_VERSION, 'taken_at': taken_at.isoformat(), 'points': points}, fp)
+        os.replace(tmp_path, self.snapshot_path)
+
+    def stop(self):
+        try:
+            self.save_snapshot()
+        except OSError:
+            logger.exception('failed to write leaderboard snapshot')
+
+
+def _board(rows) -> RankedSet:
+    return RankedSet.from_scores({user_id: int(score) for user_id, score in rows})
+
+
+def _week_bounds(week: date):
+    start = datetime.combine(week, datetime.min.time())
+    return start, start + timedelta(weeks=1)
+
+
+def _points_between(start: datetime, end: datetime):
+    """[start, end) 사이에 적립된(양수) 포인트의 사용자별 합계."""
+    return (
+        db.session.query(UserPointLog.user_id, db.func.sum(UserPointLog.change))
+        .filter(UserPointLog.created_at >= start, UserPointLog.created_at < end, UserPointLog.change > 0)
+        .group_by(UserPointLog.user_id)
+    )
+
+
+def _sleep_boards(weeks: list) -> dict:
+    scores = {week: {} for week in weeks}
+    rows = (
+        db.session.query(SleepWeeklyStat.week_start, SleepWeeklyStat.user_id, SleepWeeklyStat.total_minutes)
+        .filter(SleepWeeklyStat.week_start.in_(weeks), SleepWeeklyStat.total_minutes > 0)
+    )
+    for week, user_id, minutes in rows:
+        scores[week][user_id] = minutes
+    return {('sleep', week): RankedSet.from_scores(scores[week]) for week in weeks}
+
+
+# -- 쓰기 경로 -------------------------------------------------------------
+
+def _stage(key, delta):
+    pending = db.session.info.setdefault(_PENDING_KEY, {})
+    pending[key] = pending.get(key, 0) + delta
+
+
+def stage_points(user_id: int, changes: list, created_at: datetime):
+    """적립된 포인트를 커밋 후 반영하도록 세션에 담는다. 차감(음수)은 순위에 넣지 않는다."""
+    earned = sum(change for change in changes if change > 0)
+    if earned:
+        _stage(('points', sleep_stats.week_start(created_at.date()), user_id), earned)
+
+
+def stage_sleep(user_id: int, sessions):
+    """종료된 세션의 수면 시간을 커밋 후 반영하도록 세션에 담는다. 주는 sleep_weekly_stats와 같게 started_at 기준."""
+    for s in sessions:
+        if s.total_sleep_minutes:
+            _stage(('sleep', sleep_stats.week_start(s.started_at.date()), user_id), s.total_sleep_minutes)
+
+
+def _after_commit(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending and has_app_context():
+        boards = current_app.extensions.get('leaderboard')
+        if boards is not None:
+            boards.apply(pending)
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def get_leaderboards() -> Leaderboards:
+    return current_app.extensions['leaderboard']
+
+
+def init_app(app):
+    if not event.contains(RoutingSession, 'after_commit', _after_commit):
+        event.listen(RoutingSession, 'after_commit', _after_commit)
+        event.listen(RoutingSession, 'after_rollback', _after_rollback)
+    boards = Leaderboards(app)
+    app.extensions['leaderboard'] = boards
+    atexit.register(boards.stop)
+    return boards
@@ -0,0 +1,112 @@
+from datetime import datetime
+
+from ..extensions import db
+from ..models.points import UserPointLog
+from ..models.user import User
+from . import leaderboard
+
+
+class InsufficientPoints(Exception):
+    """차감할 포인트가 잔액보다 많다."""
+
+    def __init__(self, user_id: int, amount: int):
+        super().__init__(f'user {user_id} has fewer than {amount} points')
+        self.user_id = user_id
+        self.amount = amount
+
+
+def _apply(user_id: int, delta: int, require_balance: bool = False):
+    """users.total_points에 delta를 더하는 단일 UPDATE ... RETURNING. 갱신된 잔액(없으면 None)."""
+    users = User.__table__
+    total = db.func.coalesce(users.c.total_points, 0)
+    stmt = users.update().where(users.c.id == user_id)
+    if require_balance:
+        stmt = stmt.where(total >= -delta)
+    return db.session.execute(
+        stmt.values(total_points=total + delta).returning(users.c.total_points)
+    ).scalar_one_or_none()
+
+
+def _write_logs(user_id: int, balance: int, entries: list, type: str, created_at: datetime):
+    """entries [(change, sleep_log_id)]를 순서대로 적용한 balance_after와 함께 원장에 남긴다.
+
+    balance는 모든 entries를 반영한 뒤의 잔액이다.
+    """
+    running = balance - sum(change for change, _ in entries)
+    rows = []
+    for change, sleep_log_id in entries:
+        running += change
+        rows.append({
+            'user_id': user_id,
+            'change': change,
+            'balance_after': running,
+            'type': type,
+            'sleep_log_id': sleep_log_id,
+            'created_at': created_at,
+        })
+    db.session.execute(UserPointLog.__table__.insert(), rows)
+    leaderboard.stage_points(user_id, [change for change, _ in entries], created_at)
+
+
+def credit(user_id: int, amount: int, type: str, sleep_log_id: int = None) -> int:
+    """포인트를 지급하고 원장에 기록한다. 지급 후 잔액을 돌려준다.
+
+    잔액 갱신은 DB에서 원자적으로 이뤄지고, 행 잠금은 호출자의 트랜잭션이 커밋할 때까지 유지되므로
+    같은 사용자의 동시 지급도 balance_after가 순서대로 쌓인다. 커밋은 호출자가 한다.
+    """
+    return credit_many(user_id, [(amount, sleep_log_id)], type)
+
+
+def credit_many(user_id: int, entries: list, type: str, created_at: datetime = None) -> int:
+    """[(amount, sleep_log_id)]를 한 번의 UPDATE로 지급하고 원장 행을 한 번에 넣는다."""
+    balance = _apply(user_id, sum(amount for amount, _ in entries))
+    if balance is None:
+        raise LookupError(f'user {user_id} not found')
+    _write_logs(user_id, balance, entries, type, created_at or datetime.utcnow())
+    return balance
+
+
+def debit(user_id: int, amount: int, type: str) -> int:
+    """잔액이 충분할 때만 포인트를 차감하고 원장에 기록한다. 차감 후 잔액을 돌려준다."""
+    balance = _apply(user_id, -amount, require_balance=True)
+    if balance is None:
+        raise InsufficientPoints(user_id, amount)
+    _write_logs(user_id, balance, [(-amount, None)], type, datetime.utcnow())
+    return balance
+
+
+def find_drift(user_ids: list) -> list:
+    """[(user_id, total_points, ledger_sum)] 중 둘이 다른 사용자.
+
+    한 문장으로 읽으므로 잔액과 원장 합계가 같은 스냅샷에서 비교된다.
+    """
+    ledger = (
+        db.select(UserPointLog.user_id, db.func.sum(UserPointLog.change).label('total'))
+        .where(UserPointLog.user_id.in_(user_ids))
+        .group_by(UserPointLog.user_id)
+        .subquery()
+    )
+    expected = db.func.coalesce(ledger.c.total, 0)
+    rows = db.session.execute(
+        db.select(User.id, User.total_points, expected)
+        .outerjoin(ledger, ledger.c.user_id == User.id)
+        .where(User.id.in_(user_ids), db.func.coalesce(User.total_points, 0) != expected)
+    )
+    return [(user_id, total_points, int(ledger_sum)) for user_id, total_points, ledger_sum in rows]
+
+
+def fix_drift(user_id: int, observed) -> bool:
+    """잔액을 원장 합계로 맞춘다. 관찰한 뒤 잔액이 바뀌었으면(동시 지급) 건드리지 않고 False."""
+    ledger_sum = (
+        db.select(db.func.coalesce(db.func.sum(UserPointLog.change), 0))
+        .where(UserPointLog.user_id == User.id)
+        .scalar_subquery()
+    )
+    current = db.func.coalesce(User.total_points, 0)
+    result = db.session.execute(
+        db.update(User)
+        .where(User.id == user_id, current == (observed or 0))
+        .values(total_points=ledger_sum)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == 1
@@ -0,0 +1,105 @@
+import bisect
+import threading
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_number(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for labels, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labelnames, labels)} {_format_number(value)}')
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._series = {}  # labels -> [bucket counts, sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for labels, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, n in zip(self.buckets, counts):
+                    cumulative += n
+                    le = f'le="{_format_number(bound)}"'
+                    lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, labels, [le])} {cumulative}')
+                label_text = _format_labels(self.labelnames, labels)
+                lines.append(f'{self.name}_sum{label_text} {_format_number(total)}')
+                lines.append(f'{self.name}_count{label_text} {count}')
+        return lines
+
+
+class Registry:
+    """프로세스 내 메트릭 모음. Prometheus 텍스트 형식으로 내보낸다."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames=()) -> Counter:
+        return self._get_or_create(Counter, name, help_text, labelnames)
+
+    def histogram(self, name: str, help_text: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, help_text, labelnames, buckets)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
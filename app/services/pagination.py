@@ -0,0 +1,37 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+
+class InvalidCursor(ValueError):
+    """디코딩할 수 없는 페이지네이션 커서."""
+
+
+def encode_cursor(*values) -> str:
+    """정렬 키 값들을 불투명한 URL-safe 문자열로 인코딩한다."""
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, *types) -> tuple:
+    """encode_cursor 결과를 types 순서대로 변환해 돌려준다."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+    if not isinstance(values, list) or len(values) != len(types):
+        raise InvalidCursor(cursor)
+
+    decoded = []
+    try:
+        for value, type_ in zip(values, types):
+            if type_ is datetime:
+                decoded.append(datetime.fromisoformat(value))
+            else:
+                decoded.append(type_(value))
+    except (TypeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+    return tuple(decoded)
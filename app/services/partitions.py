@@ -0,0 +1,205 @@
+import gzip
+import json
+import os
+import re
+from datetime import date, datetime
+
+from sqlalchemy.schema import AddConstraint
+
+from ..extensions import db
+from ..models.points import UserPointLog
+from ..models.shop import ShopClickLog
+
+# 월 단위 created_at 범위 파티셔닝 대상 테이블 (PostgreSQL 전용)
+PARTITIONED_MODELS = {
+    'shop_click_logs': ShopClickLog,
+    'user_point_logs': UserPointLog,
+}
+PARTITION_KEY = 'created_at'
+_MONTH_SUFFIX_RE = re.compile(r'_(\d{4})(\d{2})$')
+
+
+class PartitionError(RuntimeError):
+    """파티션 작업을 진행할 수 없는 상태."""
+
+
+def is_supported() -> bool:
+    return db.session.get_bind().dialect.name == 'postgresql'
+
+
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, n: int) -> date:
+    index = month.year * 12 + month.month - 1 + n
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f'{table}_{month:%Y%m}'
+
+
+def _execute(sql: str, **params):
+    return db.session.execute(db.text(sql), params)
+
+
+def is_partitioned(table: str) -> bool:
+    return _execute(
+        'SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid '
+        'WHERE c.relname = :table AND pg_table_is_visible(c.oid)',
+        table=table,
+    ).first() is not None
+
+
+def list_partitions(table: str) -> list:
+    """[(partition name, month)]. 기본(default) 파티션은 month가 None이다."""
+    rows = _execute(
+        'SELECT c.relname FROM pg_inherits i '
+        'JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent '
+        'WHERE p.relname = :table AND pg_table_is_visible(p.oid) ORDER BY c.relname',
+        table=table,
+    )
+    result = []
+    for (name,) in rows:
+        match = _MONTH_SUFFIX_RE.search(name)
+        result.append((name, date(int(match.group(1)), int(match.group(2)), 1) if match else None))
+    return result
+
+
+def _create_month_partition(table: str, month: date) -> bool:
+    name = partition_name(table, month)
+    if _execute('SELECT to_regclass(:name)', name=name).scalar() is not None:
+        return False
+    _execute(
+        f'CREATE TABLE "{name}" PARTITION OF "{table}" '
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+    return True
+
+
+def ensure_partitions(table: str, months_ahead: int, today: date = None) -> list:
+    """이번 달부터 months_ahead개월 뒤까지의 파티션을 만들고 새로 만든 이름을 돌려준다."""
+    if not is_partitioned(table):
+        raise PartitionError(f'{table} is not partitioned')
+    current = month_start(today or datetime.utcnow())
+    created = [
+        partition_name(table, month)
+        for month in (add_months(current, n) for n in range(months_ahead + 1))
+        if _create_month_partition(table, month)
+    ]
+    db.session.commit()
+    return created
+
+
+def convert_table(table: str, months_ahead: int, batch_size: int = 50000, echo=print) -> int:
+    """기존 테이블을 created_at 월 단위 파티션 테이블로 바꾸고 옮긴 행 수를 돌려준다.
+
+    1) 기존 테이블과 인덱스 이름에 _legacy를 붙이고, 같은 이름의 파티션 테이블을 만든다.
+       (PK는 (id, created_at), 인덱스는 모델 정의대로 부모에 만들어 파티션마다 생긴다.)
+    2) 이름 교체는 한 트랜잭션이라 이후 쓰기는 바로 새 테이블로 들어간다.
+    3) 기존 행을 id 구간별로 옮기고 커밋한 뒤, 행 수가 맞으면 legacy 테이블을 지운다.
+    """
+    model = PARTITIONED_MODELS[table]
+    if is_partitioned(table):
+        raise PartitionError(f'{table} is already partitioned')
+    legacy = f'{table}_legacy'
+    if _execute('SELECT to_regclass(:name)', name=legacy).scalar() is not None:
+        raise PartitionError(f'{legacy} already exists')
+
+    _execute(f'LOCK TABLE "{table}" IN ACCESS EXCLUSIVE MODE')
+    bounds = _execute(f'SELECT min(created_at), max(created_at), max(id) FROM "{table}"').one()
+    for (index_name,) in _execute(
+        'SELECT indexname FROM pg_indexes WHERE tablename = :table', table=table,
+    ).all():
+        _execute(f'ALTER INDEX "{index_name}" RENAME TO "{index_name}_legacy"')
+    _execute(f'ALTER TABLE "{table}" RENAME TO "{legacy}"')
+
+    _execute(
+        f'CREATE TABLE "{table}" (LIKE "{legacy}" INCLUDING DEFAULTS INCLUDING CONSTRAINTS) '
+        f'PARTITION BY RANGE ({PARTITION_KEY})'
+    )
+    _execute(f'ALTER TABLE "{table}" ALTER COLUMN {PARTITION_KEY} SET NOT NULL')
+    _execute(f'ALTER TABLE "{table}" ADD CONSTRAINT "{table}_pkey" PRIMARY KEY (id, {PARTITION_KEY})')
+    _execute(f'ALTER SEQUENCE IF EXISTS "{table}_id_seq" OWNED BY "{table}".id')
+    _execute(f'CREATE TABLE "{table}_default" PARTITION OF "{table}" DEFAULT')
+
+    bind = db.session.connection()
+    # LIKE는 외래 키를 복사하지 않으므로 모델 정의로 다시 건다.
+    for fk in model.__table__.foreign_key_constraints:
+        bind.execute(AddConstraint(fk))
+    for index in model.__table__.indexes:
+        index.create(bind)
+
+    now = month_start(datetime.utcnow())
+    first = month_start(bounds[0]) if bounds[0] else now
+    month = first
+    while month <= add_months(now, months_ahead):
+        _create_month_partition(table, month)
+        month = add_months(month, 1)
+    db.session.commit()
+    echo(f'{table}: swapped in partitioned table, copying rows from {legacy}')
+
+    columns = [c.name for c in model.__table__.columns]
+    select_list = ', '.join(
+        f'COALESCE({name}, now() AT TIME ZONE \'utc\')' if name == PARTITION_KEY else name for name in columns
+    )
+    max_id = bounds[2] or 0
+    copied = 0
+    for low in range(0, max_id + 1, batch_size):
+        result = _execute(
+            f'INSERT INTO "{table}" ({", ".join(columns)}) '
+            f'SELECT {select_list} FROM "{legacy}" WHERE id >= :low AND id < :high',
+            low=low, high=low + batch_size,
+        )
+        db.session.commit()
+        copied += result.rowcount
+        echo(f'{table}: copied {copied} rows')
+
+    legacy_count = _execute(f'SELECT count(*) FROM "{legacy}"').scalar()
+    if legacy_count != copied:
+        raise PartitionError(f'{table}: copied {copied} rows but {legacy} has {legacy_count}; kept {legacy}')
+    _execute(f'DROP TABLE "{legacy}"')
+    db.session.commit()
+    return copied
+
+
+def _archive_path(archive_dir: str, table: str, month: date) -> str:
+    return os.path.join(archive_dir, table, f'{month:%Y%m}.ndjson.gz')
+
+
+def archive_partition(table: str, month: date, archive_dir: str, drop: bool = True) -> int:
+    """월 파티션을 NDJSON.gz로 내보낸 뒤 분리(DETACH)한다. 내보낸 행 수를 돌려준다.
+
+    파일은 임시 이름으로 쓰고 행 수를 확인한 뒤 제자리로 옮긴다. drop이면 분리한 테이블을 지운다.
+    """
+    name = partition_name(table, month)
+    path = _archive_path(archive_dir, table, month)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+
+    count = 0
+    result = db.session.execute(
+        db.text(f'SELECT * FROM "{name}" ORDER BY id').execution_options(yield_per=5000)
+    )
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+        for row in result.mappings():
+            f.write(json.dumps(dict(row), ensure_ascii=False, default=str) + '\n')
+            count += 1
+    expected = _execute(f'SELECT count(*) FROM "{name}"').scalar()
+    if expected != count:
+        os.remove(tmp_path)
+        raise PartitionError(f'{name}: exported {count} rows but partition has {expected}')
+    os.replace(tmp_path, path)
+
+    _execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+    if drop:
+        _execute(f'DROP TABLE "{name}"')
+    db.session.commit()
+    return count
+
+
+def expired_partitions(table: str, retain_months: int, today: date = None) -> list:
+    """보관 기간(이번 달 포함 retain_months개월)이 지난 월 파티션 목록."""
+    oldest_kept = add_months(month_start(today or datetime.utcnow()), -(retain_months - 1))
+    return [month for _, month in list_partitions(table) if month is not None and month < oldest_kept]
@@ -0,0 +1,176 @@
+import re
+import threading
+import time
+import unicodedata
+from collections import defaultdict
+
+from flask import current_app
+
+from ..extensions import db
+from ..models.shop import ShopProduct
+from .catalog import catalog_version
+
+# 필드별 가중치와 랭킹 보정값
+FIELD_WEIGHTS = {'title': 1.0, 'tag': 0.8, 'subtitle': 0.6}
+RECOMMENDED_BOOST = 0.1
+RATING_BOOST = 0.1  # rating 5.0일 때 최대값
+MIN_MATCH_RATIO = 0.5  # 질의 n-gram 중 이 비율 이상이 맞아야 결과에 포함
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize(text: str) -> str:
+    return unicodedata.normalize('NFKC', text or '').lower().strip()
+
+
+def ngrams(text: str) -> set:
+    """토큰별 글자 bigram. 한 글자 토큰은 그대로 쓴다. ('수면 안대' -> {'수면', '안대'})"""
+    grams = set()
+    for token in _TOKEN_RE.findall(normalize(text)):
+        if len(token) == 1:
+            grams.add(token)
+        else:
+            grams.update(token[i:i + 2] for i in range(len(token) - 1))
+    return grams
+
+
+def _boost(is_recommended, rating) -> float:
+    return (RECOMMENDED_BOOST if is_recommended else 0.0) + RATING_BOOST * min(max(rating or 0.0, 0.0), 5.0) / 5.0
+
+
+class ProductSearchIndex:
+    """SQLite 등 트라이그램 인덱스가 없는 DB를 위한 프로세스 내 역색인.
+
+    updated_at 기준으로 바뀐 상품만 다시 색인하며, 비활성 상품은 색인에서 뺀다.
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(dict)  # gram -> {product_id: field weight}
+        self._docs = {}  # product_id -> (grams, is_recommended, rating)
+        self._high_water = None
+        self._refreshed_at = 0.0
+        self._version = None
+        self._lock = threading.RLock()
+
+    def _remove(self, product_id):
+        doc = self._docs.pop(product_id, None)
+        if doc is None:
+            return
+        for gram in doc[0]:
+            postings = self._postings.get(gram)
+            if postings is not None:
+                postings.pop(product_id, None)
+                if not postings:
+                    del self._postings[gram]
+
+    def _add(self, row):
+        weights = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            for gram in ngrams(getattr(row, field)):
+                if weight > weights.get(gram, 0.0):
+                    weights[gram] = weight
+        for gram, weight in weights.items():
+            self._postings[gram][row.id] = weight
+        self._docs[row.id] = (set(weights), row.is_recommended, row.rating)
+
+    def refresh(self, min_interval: float = 0.0, version=None) -> int:
+        """마지막 high-water mark 이후 바뀐 상품을 다시 색인하고 처리한 행 수를 돌려준다.
+
+        카탈로그 버전이 그대로면 min_interval 초 안에는 다시 읽지 않는다.
+        """
+        with self._lock:
+            if version == self._version and time.monotonic() - self._refreshed_at < min_interval:
+                return 0
+            self._version = version
+            query = db.session.query(
+                ShopProduct.id, ShopProduct.title, ShopProduct.subtitle, ShopProduct.tag,
+                ShopProduct.is_recommended, ShopProduct.rating, ShopProduct.is_active, ShopProduct.updated_at,
+            )
+            if self._high_water is not None:
+                # 같은 시각에 갱신된 행을 놓치지 않도록 >=로 읽는다. 재색인은 멱등이다.
+                query = query.filter(ShopProduct.updated_at >= self._high_water)
+
+            count = 0
+            for row in query.yield_per(1000):
+                self._remove(row.id)
+                if row.is_active:
+                    self._add(row)
+                if self._high_water is None or row.updated_at > self._high_water:
+                    self._high_water = row.updated_at
+                count += 1
+            self._refreshed_at = time.monotonic()
+            return count
+
+    def search(self, query: str, limit: int) -> list:
+        """[(product_id, score)]를 점수 내림차순으로 돌려준다."""
+        grams = ngrams(query)
+        if not grams:
+            return []
+        with self._lock:
+            matched = defaultdict(lambda: [0, 0.0])  # product_id -> [맞은 gram 수, 가중치 합]
+            for gram in grams:
+                for product_id, weight in self._postings.get(gram, {}).items():
+                    acc = matched[product_id]
+                    acc[0] += 1
+                    acc[1] += weight
+            results = []
+            for product_id, (hits, total) in matched.items():
+                if hits / len(grams) < MIN_MATCH_RATIO:
+                    continue
+                relevance = total / len(grams)
+                _, is_recommended, rating = self._docs[product_id]
+                results.append((product_id, round(relevance + _boost(is_recommended, rating), 4)))
+        results.sort(key=lambda item: (-item[1], -item[0]))
+        return results[:limit]
+
+
+_index = ProductSearchIndex()
+
+
+def _escape_like(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _search_postgres(query: str, limit: int) -> list:
+    """pg_trgm GIN 인덱스(ILIKE, <% 연산자)로 후보를 찾고 word_similarity로 순위를 매긴다."""
+    q = normalize(query)
+    pattern = f'%{_escape_like(q)}%'
+    subtitle = db.func.coalesce(ShopProduct.subtitle, '')
+    tag = db.func.coalesce(ShopProduct.tag, '')
+    relevance = db.func.greatest(
+        db.func.word_similarity(q, ShopProduct.title) * FIELD_WEIGHTS['title'],
+        db.func.word_similarity(q, tag) * FIELD_WEIGHTS['tag'],
+        db.func.word_similarity(q, subtitle) * FIELD_WEIGHTS['subtitle'],
+    )
+    boost = (
+        db.case((ShopProduct.is_recommended.is_(True), RECOMMENDED_BOOST), else_=0.0)
+        + RATING_BOOST * db.func.coalesce(ShopProduct.rating, 0.0) / 5.0
+    )
+    score = (relevance + boost).label('score')
+    literal = db.literal(q)
+    rows = (
+        db.session.query(ShopProduct.id, score)
+        .filter(
+            ShopProduct.is_active.is_(True),
+            db.or_(
+                ShopProduct.title.ilike(pattern, escape='\\'),
+                ShopProduct.subtitle.ilike(pattern, escape='\\'),
+                ShopProduct.tag.ilike(pattern, escape='\\'),
+                literal.op('<%')(ShopProduct.title),
+                literal.op('<%')(ShopProduct.subtitle),
+            ),
+        )
+        .order_by(score.desc(), ShopProduct.id.desc())
+        .limit(limit)
+    )
+    return [(row.id, round(float(row.score), 4)) for row in rows]
+
+
+def search_products(query: str, limit: int = 20) -> list:
+    """[(product_id, score)] 검색 결과. SHOP_SEARCH_BACKEND: auto, postgres, memory."""
+    backend = current_app.config.get('SHOP_SEARCH_BACKEND', 'auto')
+    if backend == 'auto':
+        backend = 'postgres' if db.session.get_bind().dialect.name == 'postgresql' else 'memory'
+    if backend == 'postgres':
+        return _search_postgres(query, limit)
+    _index.refresh(current_app.config.get('SHOP_SEARCH_REFRESH_SECONDS', 30), catalog_version())
+    return _index.search(query, limit)
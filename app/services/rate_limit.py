@@ -0,0 +1,152 @@
+import math
+import threading
+import time
+
+from flask import current_app, g, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from werkzeug.utils import import_string
+
+from .cache import TTLCache
+from .metrics import REGISTRY
+
+REJECTED_TOTAL = REGISTRY.counter(
+    'http_rejected_requests_total', '처리 전에 거절한 요청 수.', ['endpoint', 'reason'],
+)
+
+_PERIODS = {'second': 1, 'minute': 60, 'hour': 3600}
+
+
+def parse_limit(spec: str):
+    """'30/minute' -> (초당 보충량, 버킷 크기). 버킷은 한 주기 동안의 허용량만큼 몰아서 쓸 수 있다."""
+    count, _, period = spec.partition('/')
+    seconds = _PERIODS.get(period.strip())
+    if seconds is None or not count.strip().isdigit() or int(count) <= 0:
+        raise ValueError(f'invalid rate limit {spec!r}, expected e.g. "30/minute"')
+    return int(count) / seconds, int(count)
+
+
+class RateLimitBackend:
+    """토큰 버킷 상태 저장소. 여러 프로세스가 버킷을 나눠 쓰려면 공유 저장소로 구현한다."""
+
+    def __init__(self, app):
+        self.app = app
+
+    def consume(self, key: str, rate: float, capacity: int, cost: int = 1) -> float:
+        """토큰을 cost만큼 꺼낸다. 성공하면 0, 부족하면 다음에 성공할 때까지 기다릴 초."""
+        raise NotImplementedError
+
+
+class LocalBackend(RateLimitBackend):
+    """프로세스 메모리의 토큰 버킷. 워커가 N개면 사용자별 한도도 실제로는 최대 N배가 된다.
+
+    버킷은 가득 찰 때까지 걸리는 시간이 지나면 만료된다. 만료된 버킷은 가득 찬 버킷과 같으므로 잃는 것이 없다.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._buckets = TTLCache(maxsize=app.config.get('RATE_LIMIT_MAX_KEYS', 100000))
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, rate: float, capacity: int, cost: int = 1) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key) or (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            if tokens < cost:
+                return (cost - tokens) / rate
+            tokens -= cost
+            self._buckets.set(key, (tokens, now), ttl=(capacity - tokens) / rate)
+        return 0.0
+
+
+class AdmissionController:
+    """RATE_LIMITS에 있는 엔드포인트의 동시 처리 수 상한. 넘치면 작업을 시작하기 전에 503으로 돌려보낸다."""
+
+    def __init__(self, max_inflight: int, wait: float):
+        self.max_inflight = max_inflight
+        self.wait = wait
+        self._slots = threading.BoundedSemaphore(max_inflight) if max_inflight > 0 else None
+
+    def acquire(self) -> bool:
+        if self._slots is None:
+            return True
+        return self._slots.acquire(timeout=self.wait) if self.wait > 0 else self._slots.acquire(blocking=False)
+
+    def release(self):
+        if self._slots is not None:
+            self._slots.release()
+
+
+def _client_key() -> str:
+    """유효한 JWT가 있으면 사용자 id, 없으면 접속 IP.
+
+    로드 밸런서 뒤에서는 TRUSTED_PROXY_COUNT를 설정해야 remote_addr이 프록시가 아닌 클라이언트 IP가 된다.
+    """
+    try:
+        verify_jwt_in_request(optional=True)
+        identity = get_jwt_identity()
+    except Exception:
+        identity = None  # 토큰 오류는 뷰에서 원래대로 응답한다.
+    if identity is not None:
+        return f'u:{identity}'
+    return f'ip:{request.remote_addr}'
+
+
+def _reject(reason: str, message: str, status: int, retry_after: float):
+    REJECTED_TOTAL.inc(request.endpoint, reason)
+    return {'message': message}, status, {'Retry-After': str(max(math.ceil(retry_after), 1))}
+
+
+def _before_request():
+    state = current_app.extensions['rate_limit']
+    limit = state['limits'].get(request.endpoint)
+    if limit is None:
+        return None
+
+    # 자리를 먼저 잡는다. 503으로 돌려보낸 요청이 토큰까지 써 버리지 않게 한다.
+    admission = state['admission']
+    if not admission.acquire():
+        return _reject('overloaded', '서버가 바쁩니다. 잠시 후 다시 시도해 주세요.', 503, state['retry_after'])
+
+    rate, capacity = limit
+    try:
+        wait = state['backend'].consume(f'{request.endpoint}:{_client_key()}', rate, capacity)
+    except Exception:
+        admission.release()  # 공유 저장소 오류 등으로 실패해도 자리는 돌려준다.
+        raise
+    if wait > 0:
+        admission.release()
+        return _reject('rate_limited', '요청이 너무 많습니다. 잠시 후 다시 시도해 주세요.', 429, wait)
+    g._admitted = admission
+    return None
+
+
+def _teardown_request(exc):
+    admission = g.pop('_admitted', None)
+    if admission is not None:
+        admission.release()
+
+
+def init_app(app):
+    """RATE_LIMITS({endpoint: '횟수/주기'})에 있는 엔드포인트에 토큰 버킷과 동시 처리 상한을 건다.
+
+    RATE_LIMIT_BACKEND는 'local' 또는 RateLimitBackend를 구현한 클래스의 import 경로('pkg.module:Class').
+    """
+    config = app.config
+    if not config.get('RATE_LIMIT_ENABLED', True):
+        return None
+
+    backend_name = config.get('RATE_LIMIT_BACKEND', 'local')
+    backend_class = LocalBackend if backend_name == 'local' else import_string(backend_name)
+    state = {
+        'limits': {endpoint: parse_limit(spec) for endpoint, spec in config.get('RATE_LIMITS', {}).items()},
+        'backend': backend_class(app),
+        'admission': AdmissionController(
+            config.get('ADMISSION_MAX_INFLIGHT', 0), config.get('ADMISSION_WAIT_SECONDS', 0.0),
+        ),
+        'retry_after': config.get('ADMISSION_RETRY_AFTER', 1),
+    }
+    app.extensions['rate_limit'] = state
+    app.before_request(_before_request)
+    app.teardown_request(_teardown_request)
+    return state
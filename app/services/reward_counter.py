@@ -0,0 +1,81 @@
+from datetime import date, datetime
+
+from ..extensions import db
+from ..models.points import UserDailyRewardCounter
+from .sql import dialect_insert
+
+
+def claim_daily_points(user_id: int, reward_type: str, amount: int, limit: int, day: date = None):
+    """당일 한도 안에서 amount를 선점하고 (실제 지급량, 지급 후 당일 합계)를 돌려준다.
+
+    INSERT ... ON CONFLICT DO UPDATE ... RETURNING 한 문장으로 처리하므로 행 잠금이 걸려
+    같은 사용자의 세션이 동시에 끝나도 한도를 넘지 않는다. 호출자의 트랜잭션 안에서 실행된다.
+    """
+    day = day or datetime.utcnow().date()
+    amount = max(int(amount or 0), 0)
+    table = UserDailyRewardCounter.__table__
+    room = db.case((table.c.points < limit, limit - table.c.points), else_=0)
+    grant = db.case((room < amount, room), else_=amount)
+    first_grant = min(amount, max(limit, 0))
+    now = datetime.utcnow()
+
+    stmt = dialect_insert(table).values(
+        user_id=user_id,
+        day=day,
+        type=reward_type,
+        points=first_grant,
+        last_credit=first_grant,
+        updated_at=now,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'day', 'type'],
+        set_={'points': table.c.points + grant, 'last_credit': grant, 'updated_at': now},
+    ).returning(table.c.last_credit, table.c.points)
+    granted, total = db.session.execute(stmt).one()
+    return granted, total
+
+
+def claim_daily_points_bulk(user_id: int, reward_type: str, claims: list, limit: int) -> list:
+    """여러 (day, amount) 요청을 순서대로 한도에 맞춰 선점하고 요청별 지급량 목록을 돌려준다.
+
+    요청 수와 관계없이 INSERT(빈 행 보장) → SELECT ... FOR UPDATE → upsert 세 번의 왕복으로 끝난다.
+    """
+    if not claims:
+        return []
+    table = UserDailyRewardCounter.__table__
+    days = sorted({day for day, _ in claims})
+    now = datetime.utcnow()
+
+    db.session.execute(
+        dialect_insert(table).on_conflict_do_nothing(index_elements=['user_id', 'day', 'type']),
+        [{'user_id': user_id, 'day': day, 'type': reward_type, 'points': 0, 'last_credit': 0, 'updated_at': now}
+         for day in days],
+    )
+    current = dict(
+        db.session.query(UserDailyRewardCounter.day, UserDailyRewardCounter.points)
+        .filter(
+            UserDailyRewardCounter.user_id == user_id,
+            UserDailyRewardCounter.type == reward_type,
+            UserDailyRewardCounter.day.in_(days),
+        )
+        .with_for_update()
+        .all()
+    )
+
+    granted, last = [], {}
+    for day, amount in claims:
+        grant = min(max(int(amount or 0), 0), max(limit - current[day], 0))
+        current[day] += grant
+        last[day] = grant
+        granted.append(grant)
+
+    insert = dialect_insert(table)
+    db.session.execute(
+        insert.on_conflict_do_update(
+            index_elements=['user_id', 'day', 'type'],
+            set_={'points': insert.excluded.points, 'last_credit': insert.excluded.last_credit, 'updated_at': now},
+        ),
+        [{'user_id': user_id, 'day': day, 'type': reward_type, 'points': current[day], 'last_credit': last[day],
+          'updated_at': now} for day in days],
+    )
+    return granted
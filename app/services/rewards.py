@@ -0,0 +1,148 @@
+import random
+
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+from ..models.rewards import Reward, RewardRedemption, RewardStockShard
+from . import ledger
+
+REDEEM_POINT_TYPE = 'reward_redeem'
+
+
+class RedemptionError(Exception):
+    """리워드 교환 실패."""
+
+    def __init__(self, code: str, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def create_reward(title: str, cost: int, stock: int = None, shards: int = 1, **fields) -> Reward:
+    """리워드와 재고 샤드를 만든다. 재고는 샤드에 고르게 나눈다. 커밋은 호출자가 한다."""
+    shards = max(shards, 1)
+    reward = Reward(title=title, cost=cost, stock_total=stock, stock_shards=shards, **fields)
+    db.session.add(reward)
+    db.session.flush()
+    if stock is not None:
+        base, extra = divmod(stock, shards)
+        db.session.execute(RewardStockShard.__table__.insert(), [
+            {'reward_id': reward.id, 'shard': shard, 'remaining': base + (1 if shard < extra else 0)}
+            for shard in range(shards)
+        ])
+    return reward
+
+
+def remaining_stock(reward_ids: list) -> dict:
+    """{reward_id: 남은 재고}. 재고 샤드가 없는 리워드(무제한)는 빠진다."""
+    if not reward_ids:
+        return {}
+    rows = (
+        db.session.query(RewardStockShard.reward_id, db.func.sum(RewardStockShard.remaining))
+        .filter(RewardStockShard.reward_id.in_(reward_ids))
+        .group_by(RewardStockShard.reward_id)
+    )
+    return {reward_id: int(remaining) for reward_id, remaining in rows}
+
+
+def serialize_redemption(row) -> dict:
+    return {
+        'redemption_id': row.id,
+        'reward_id': row.reward_id,
+        'cost': row.cost,
+        'balance_after': row.balance_after,
+        'created_at': row.created_at.isoformat(),
+    }
+
+
+def _find_redemption(user_id: int, idempotency_key: str):
+    return (
+        db.session.query(RewardRedemption)
+        .filter(RewardRedemption.user_id == user_id, RewardRedemption.idempotency_key == idempotency_key)
+        .first()
+    )
+
+
+def _take_stock(reward_id: int, candidates: list):
+    """남은 샤드를 임의 순서로 골라 조건부 차감한다. 차감한 샤드 번호(모두 소진이면 None).
+
+    샤드마다 다른 행을 잠그므로 인기 리워드라도 교환이 한 행에 줄 서지 않는다.
+    """
+    shards = RewardStockShard.__table__
+    random.shuffle(candidates)
+    for shard in candidates:
+        taken = db.session.execute(
+            shards.update()
+            .where(shards.c.reward_id == reward_id, shards.c.shard == shard, shards.c.remaining > 0)
+            .values(remaining=shards.c.remaining - 1)
+            .returning(shards.c.shard)
+        ).scalar_one_or_none()
+        if taken is not None:
+            return taken
+    return None
+
+
+def redeem(user_id: int, reward_id: int, idempotency_key: str):
+    """포인트로 리워드를 교환한다. (교환 dict, 새로 교환했는지)를 돌려준다.
+
+    같은 idempotency_key로 다시 요청하면 처음 결과를 그대로 돌려준다. 사용자 잔액 차감(사용자 행 잠금)을
+    먼저 하고 재고 샤드 차감을 마지막에 해서, 경합이 큰 샤드 행의 잠금은 커밋 직전 잠깐만 잡힌다.
+    """
+    existing = _find_redemption(user_id, idempotency_key)
+    if existing is not None:
+        if existing.reward_id != reward_id:
+            raise RedemptionError('idempotency_conflict', '다른 리워드에 이미 사용한 멱등 키입니다.')
+        return serialize_redemption(existing), False
+
+    reward = (
+        db.session.query(Reward.id, Reward.cost, Reward.stock_total)
+        .filter(Reward.id == reward_id, Reward.is_active.is_(True))
+        .first()
+    )
+    if reward is None:
+        raise RedemptionError('not_found', '리워드를 찾을 수 없습니다.')
+
+    candidates = None
+    if reward.stock_total is not None:
+        candidates = [
+            shard for (shard,) in db.session.query(RewardStockShard.shard)
+            .filter(RewardStockShard.reward_id == reward_id, RewardStockShard.remaining > 0)
+        ]
+        if not candidates:
+            db.session.rollback()
+            raise RedemptionError('sold_out', '품절된 리워드입니다.')
+
+    try:
+        balance = ledger.debit(user_id, reward.cost, REDEEM_POINT_TYPE)
+    except ledger.InsufficientPoints:
+        db.session.rollback()
+        raise RedemptionError('insufficient_points', '포인트가 부족합니다.') from None
+
+    shard = None
+    if candidates is not None:
+        shard = _take_stock(reward_id, candidates)
+        if shard is None:
+            db.session.rollback()
+            raise RedemptionError('sold_out', '품절된 리워드입니다.')
+
+    redemption = RewardRedemption(
+        user_id=user_id,
+        reward_id=reward_id,
+        idempotency_key=idempotency_key,
+        cost=reward.cost,
+        shard=shard,
+        balance_after=balance,
+    )
+    db.session.add(redemption)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # 같은 키로 동시에 들어온 요청이 먼저 커밋했다. 이쪽의 차감은 모두 되돌린다.
+        db.session.rollback()
+        existing = _find_redemption(user_id, idempotency_key)
+        if existing is None:
+            raise
+        if existing.reward_id != reward_id:
+            raise RedemptionError('idempotency_conflict', '다른 리워드에 이미 사용한 멱등 키입니다.') from None
+        return serialize_redemption(existing), False
+    return serialize_redemption(redemption), True
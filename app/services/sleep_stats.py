@@ -0,0 +1,181 @@
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+from ..extensions import db
+from ..models.sleep import SleepDailyStat, SleepLog, SleepMoodDailyStat, SleepWeeklyStat
+from . import leaderboard
+from .sql import upsert_increment, week_start_expr
+
+_SUM_COLUMNS = ['session_count', 'total_minutes', 'score_sum', 'score_count']
+STREAK_WINDOW_DAYS = 366
+
+
+def week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
+
+
+def record_sessions(user_id: int, sessions):
+    """종료된 세션들을 일간/주간/기분 롤업에 더한다. 호출자의 트랜잭션 안에서 실행된다.
+
+    sessions는 started_at, total_sleep_minutes, sleep_score, mood 속성을 가진 객체 목록이다.
+    """
+    daily, weekly, moods = {}, {}, Counter()
+    for s in sessions:
+        day = s.started_at.date()
+        for bucket, key in ((daily, day), (weekly, week_start(day))):
+            acc = bucket.setdefault(key, Counter())
+            acc['session_count'] += 1
+            acc['total_minutes'] += s.total_sleep_minutes or 0
+            if s.sleep_score is not None:
+                acc['score_sum'] += s.sleep_score
+                acc['score_count'] += 1
+        if s.mood:
+            moods[(day, s.mood)] += 1
+
+    upsert_increment(
+        SleepDailyStat.__table__,
+        [{'user_id': user_id, 'day': day, **{c: acc[c] for c in _SUM_COLUMNS}} for day, acc in daily.items()],
+        key_columns=['user_id', 'day'],
+        increment_columns=_SUM_COLUMNS,
+    )
+    upsert_increment(
+        SleepWeeklyStat.__table__,
+        [{'user_id': user_id, 'week_start': ws, **{c: acc[c] for c in _SUM_COLUMNS}} for ws, acc in weekly.items()],
+        key_columns=['user_id', 'week_start'],
+        increment_columns=_SUM_COLUMNS,
+    )
+    upsert_increment(
+        SleepMoodDailyStat.__table__,
+        [{'user_id': user_id, 'day': day, 'mood': mood, 'count': n} for (day, mood), n in moods.items()],
+        key_columns=['user_id', 'day', 'mood'],
+        increment_columns=['count'],
+    )
+    leaderboard.stage_sleep(user_id, sessions)
+
+
+def _streaks(user_id: int, today: date):
+    """(현재 연속 기록 일수, 최근 STREAK_WINDOW_DAYS 안의 최장 연속 일수)."""
+    days = [
+        d for (d,) in db.session.query(SleepDailyStat.day)
+        .filter(
+            SleepDailyStat.user_id == user_id,
+            SleepDailyStat.day > today - timedelta(days=STREAK_WINDOW_DAYS),
+            SleepDailyStat.day <= today,
+        )
+        .order_by(SleepDailyStat.day.desc())
+    ]
+    current = longest = run = 0
+    prev = None
+    for d in days:
+        run = run + 1 if prev is not None and prev - d == timedelta(days=1) else 1
+        longest = max(longest, run)
+        prev = d
+
+    # 오늘 아직 기록이 없으면 어제까지 이어진 기록을 현재 연속으로 본다.
+    expected = today if days and days[0] == today else today - timedelta(days=1)
+    for d in days:
+        if d != expected:
+            break
+        current += 1
+        expected -= timedelta(days=1)
+    return current, longest
+
+
+def get_stats(user_id: int, period: str, anchor: date) -> dict:
+    if period == 'week':
+        start = week_start(anchor)
+        end = start + timedelta(days=7)
+        row = SleepWeeklyStat.query.filter_by(user_id=user_id, week_start=start).first()
+        totals = {c: getattr(row, c) if row else 0 for c in _SUM_COLUMNS}
+    else:
+        start = anchor.replace(day=1)
+        end = (start + timedelta(days=32)).replace(day=1)
+        row = (
+            db.session.query(*[db.func.coalesce(db.func.sum(getattr(SleepDailyStat, c)), 0) for c in _SUM_COLUMNS])
+            .filter(SleepDailyStat.user_id == user_id, SleepDailyStat.day >= start, SleepDailyStat.day < end)
+            .one()
+        )
+        totals = dict(zip(_SUM_COLUMNS, (int(v) for v in row)))
+
+    moods = (
+        db.session.query(SleepMoodDailyStat.mood, db.func.sum(SleepMoodDailyStat.count))
+        .filter(SleepMoodDailyStat.user_id == user_id, SleepMoodDailyStat.day >= start, SleepMoodDailyStat.day < end)
+        .group_by(SleepMoodDailyStat.mood)
+    )
+    current_streak, longest_streak = _streaks(user_id, datetime.utcnow().date())
+
+    sessions = totals['session_count']
+    return {
+        'period': period,
+        'start': start.isoformat(),
+        'end': (end - timedelta(days=1)).isoformat(),
+        'session_count': sessions,
+        'avg_sleep_minutes': round(totals['total_minutes'] / sessions, 1) if sessions else None,
+        'avg_sleep_score': round(totals['score_sum'] / totals['score_count'], 1) if totals['score_count'] else None,
+        'current_streak': current_streak,
+        'longest_streak': longest_streak,
+        'mood_distribution': {mood: int(n) for mood, n in moods},
+    }
+
+
+def _in_user_range(model, low: int, high: int):
+    return db.and_(model.user_id >= low, model.user_id < high)
+
+
+def rebuild(batch_size: int = 1000) -> int:
+    """sleep_logs에서 롤업을 다시 계산한다.
+
+    사용자 id 구간마다 기존 롤업을 지우고 GROUP BY 집계를 INSERT ... SELECT로 한 번에 넣는다.
+    처리한 사용자 구간 수를 돌려준다.
+    """
+    max_user_id = db.session.query(db.func.max(SleepLog.user_id)).scalar() or 0
+    ended = SleepLog.status == 'ended'
+    day = db.func.date(SleepLog.started_at)
+    batches = 0
+
+    for low in range(0, max_user_id + 1, batch_size):
+        high = low + batch_size
+        for model in (SleepDailyStat, SleepWeeklyStat, SleepMoodDailyStat):
+            db.session.execute(db.delete(model).where(_in_user_range(model, low, high)))
+
+        daily_select = (
+            db.select(
+                SleepLog.user_id,
+                day,
+                db.func.count(),
+                db.func.sum(db.func.coalesce(SleepLog.total_sleep_minutes, 0)),
+                db.func.sum(db.func.coalesce(SleepLog.sleep_score, 0)),
+                db.func.count(SleepLog.sleep_score),
+            )
+            .where(ended, _in_user_range(SleepLog, low, high))
+            .group_by(SleepLog.user_id, day)
+        )
+        db.session.execute(
+            db.insert(SleepDailyStat).from_select(['user_id', 'day', *_SUM_COLUMNS], daily_select)
+        )
+
+        week = week_start_expr(SleepDailyStat.day)
+        weekly_select = (
+            db.select(
+                SleepDailyStat.user_id,
+                week,
+                *[db.func.sum(getattr(SleepDailyStat, c)) for c in _SUM_COLUMNS],
+            )
+            .where(_in_user_range(SleepDailyStat, low, high))
+            .group_by(SleepDailyStat.user_id, week)
+        )
+        db.session.execute(
+            db.insert(SleepWeeklyStat).from_select(['user_id', 'week_start', *_SUM_COLUMNS], weekly_select)
+        )
+
+        mood_select = (
+            db.select(SleepLog.user_id, day, SleepLog.mood, db.func.count())
+            .where(ended, _in_user_range(SleepLog, low, high), SleepLog.mood.isnot(None))
+            .group_by(SleepLog.user_id, day, SleepLog.mood)
+        )
+        db.session.execute(
+            db.insert(SleepMoodDailyStat).from_select(['user_id', 'day', 'mood', 'count'], mood_select)
+        )
+        db.session.commit()
+        batches += 1
+    return batches
@@ -1,7 +1,23 @@
+import hashlib
+import re
+import threading
+import time
+
 import requests
 from flask import current_app
-from google.auth.transport import requests as google_requests
-from google.oauth2 import id_token
+from google.auth import jwt as google_jwt
+from requests.adapters import HTTPAdapter
+
+from .cache import TTLCache
+
+GOOGLE_ISSUERS = ('accounts.google.com', 'https://accounts.google.com')
+_MAX_AGE_RE = re.compile(r'max-age=(\d+)')
+
+_lock = threading.Lock()
+_http = None
+_verified = None
+_google_certs = {'certs': None, 'expires': 0.0, 'fetched': 0.0}
+_FORCED_REFRESH_INTERVAL = 60  # 잘못된 토큰이 인증서 재요청을 폭주시키지 않도록 제한
 
 
 class SocialAuthError(Exception):
@@ -13,40 +29,127 @@ class SocialAuthError(Exception):
         self.message = message
 
 
+def _http_session() -> requests.Session:
+    """제공자 API 호출에 재사용하는 커넥션 풀 세션."""
+    global _http
+    if _http is None:
+        with _lock:
+            if _http is None:
+                pool_size = current_app.config.get('SOCIAL_HTTP_POOL_SIZE', 20)
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _http = session
+    return _http
+
+
+def _verified_cache() -> TTLCache:
+    global _verified
+    if _verified is None:
+        with _lock:
+            if _verified is None:
+                _verified = TTLCache(
+                    maxsize=current_app.config.get('SOCIAL_TOKEN_CACHE_SIZE', 10000),
+                    ttl=current_app.config.get('SOCIAL_TOKEN_CACHE_TTL', 60),
+                )
+    return _verified
+
+
+def reset_caches():
+    """설정이 바뀐 경우(테스트 등) 세션과 캐시를 다시 만들도록 비운다."""
+    global _http, _verified
+    with _lock:
+        _http = None
+        _verified = None
+        _google_certs.update(certs=None, expires=0.0, fetched=0.0)
+
+
 def verify_social_token(provider: str, token: str) -> dict:
     provider = (provider or '').lower()
+    if provider not in ('google', 'kakao'):
+        raise SocialAuthError('unsupported_provider', '지원하지 않는 로그인 제공자입니다.')
+
+    # 원문 토큰 대신 해시를 키로 쓴다.
+    key = hashlib.sha256(f'{provider}:{token}'.encode()).hexdigest() if token else None
+    if key:
+        cached = _verified_cache().get(key)
+        if cached is not None:
+            return dict(cached)
+
     if provider == 'google':
-        return _verify_google_token(token)
-    if provider == 'kakao':
-        return _verify_kakao_token(token)
-    raise SocialAuthError('unsupported_provider', '지원하지 않는 로그인 제공자입니다.')
+        profile, expires_at = _verify_google_token(token)
+    else:
+        profile, expires_at = _verify_kakao_token(token)
+
+    ttl = _verified_cache().ttl
+    if expires_at is not None:
+        ttl = min(ttl, expires_at - time.time())
+    if ttl > 0:
+        _verified_cache().set(key, profile, ttl=ttl)
+    return dict(profile)
+
+
+def _fetch_google_certs(force: bool = False) -> dict:
+    """구글 서명 인증서. 응답의 Cache-Control max-age 동안 재사용한다."""
+    now = time.monotonic()
+    if _google_certs['certs'] is not None:
+        if force and now - _google_certs['fetched'] < _FORCED_REFRESH_INTERVAL:
+            return _google_certs['certs']
+        if not force and _google_certs['expires'] > now:
+            return _google_certs['certs']
+
+    config = current_app.config
+    try:
+        resp = _http_session().get(config['GOOGLE_CERTS_URL'], timeout=config.get('SOCIAL_HTTP_TIMEOUT', 5))
+        resp.raise_for_status()
+        certs = resp.json()
+    except (requests.RequestException, ValueError) as exc:
+        if _google_certs['certs'] is not None:
+            return _google_certs['certs']  # 만료된 캐시라도 장애 시에는 사용
+        raise SocialAuthError('provider_unavailable', '구글 인증 서버에 연결할 수 없습니다.') from exc
+
+    match = _MAX_AGE_RE.search(resp.headers.get('Cache-Control', ''))
+    max_age = int(match.group(1)) if match else 300
+    _google_certs.update(certs=certs, expires=now + max_age, fetched=now)
+    return certs
 
 
-def _verify_google_token(token: str) -> dict:
+def _verify_google_token(token: str):
     if not token:
         raise SocialAuthError('invalid_token', '구글 토큰이 전달되지 않았습니다.')
-    request = google_requests.Request()
     audience = current_app.config.get('GOOGLE_CLIENT_ID')
     try:
-        payload = id_token.verify_oauth2_token(token, request, audience=audience)
-    except ValueError as exc:  # 검증 실패
-        raise SocialAuthError('invalid_token', '구글 토큰 검증에 실패했습니다.') from exc
+        payload = google_jwt.decode(token, certs=_fetch_google_certs(), audience=audience)
+    except ValueError:
+        # 키 교체 직후에는 캐시에 새 kid가 없을 수 있으므로 한 번만 다시 받아 본다.
+        try:
+            payload = google_jwt.decode(token, certs=_fetch_google_certs(force=True), audience=audience)
+        except ValueError as exc:  # 검증 실패
+            raise SocialAuthError('invalid_token', '구글 토큰 검증에 실패했습니다.') from exc
 
-    return {
+    if payload.get('iss') not in GOOGLE_ISSUERS:
+        raise SocialAuthError('invalid_token', '구글 토큰 검증에 실패했습니다.')
+
+    profile = {
         'provider': 'google',
         'provider_user_id': payload.get('sub'),
         'email': payload.get('email'),
         'display_name': payload.get('name'),
         'profile_image_url': payload.get('picture'),
     }
+    return profile, payload.get('exp')
 
 
-def _verify_kakao_token(token: str) -> dict:
+def _verify_kakao_token(token: str):
     if not token:
         raise SocialAuthError('invalid_token', '카카오 토큰이 전달되지 않았습니다.')
+    config = current_app.config
     headers = {'Authorization': f'Bearer {token}'}
     try:
-        resp = requests.get('https://kapi.kakao.com/v2/user/me', headers=headers, timeout=5)
+        resp = _http_session().get(
+            config['KAKAO_USER_ME_URL'], headers=headers, timeout=config.get('SOCIAL_HTTP_TIMEOUT', 5),
+        )
     except requests.RequestException as exc:
         raise SocialAuthError('provider_unavailable', '카카오 인증 서버에 연결할 수 없습니다.') from exc
 
@@ -63,4 +166,4 @@ def _verify_kakao_token(token: str) -> dict:
         'email': kakao_account.get('email'),
         'display_name': profile.get('nickname'),
         'profile_image_url': profile.get('profile_image_url') or profile.get('thumbnail_image_url'),
-    }
+    }, None
@@ -0,0 +1,35 @@
+from ..extensions import db
+
+
+def dialect_insert(table):
+    """ON CONFLICT 절을 쓸 수 있는 현재 DB 방언의 INSERT 구문."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f'upsert is not supported on {dialect}')
+    return insert(table)
+
+
+def upsert_increment(table, rows: list, key_columns: list, increment_columns: list):
+    """키가 겹치면 increment_columns 값을 더하는 다중 행 upsert."""
+    if not rows:
+        return
+    stmt = dialect_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=key_columns,
+        set_={name: table.c[name] + stmt.excluded[name] for name in increment_columns},
+    )
+    db.session.execute(stmt, rows)
+
+
+def week_start_expr(column):
+    """column이 속한 주의 월요일 날짜를 구하는 SQL 식."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        return db.cast(db.func.date_trunc('week', column), db.Date)
+    if dialect == 'sqlite':
+        return db.func.date(column, 'weekday 0', '-6 days')
+    raise NotImplementedError(f'week_start_expr is not supported on {dialect}')
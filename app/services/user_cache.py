@@ -0,0 +1,99 @@
+import threading
+from collections import namedtuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event
+
+from ..extensions import db
+from ..models.user import User
+from .cache import TTLCache
+from .db_routing import RoutingSession
+
+# 자주 바뀌는 total_points는 넣지 않는다. 잔액은 항상 DB에서 읽는다.
+UserSnapshot = namedtuple('UserSnapshot', ['id', 'provider', 'email', 'display_name', 'profile_image_url'])
+
+_PENDING_KEY = 'user_cache_invalidate'
+
+_lock = threading.Lock()
+_cache: TTLCache = None
+
+
+def _get_cache() -> TTLCache:
+    global _cache
+    if _cache is None:
+        with _lock:
+            if _cache is None:
+                _cache = TTLCache(
+                    maxsize=current_app.config.get('USER_CACHE_SIZE', 50000),
+                    ttl=current_app.config.get('USER_CACHE_TTL', 60),
+                )
+    return _cache
+
+
+def get_many(user_ids) -> dict:
+    """{user_id: UserSnapshot}. 없는 사용자는 빠진다. 캐시에 없는 사용자는 한 번의 IN 조회로 채운다.
+
+    프로필 변경은 이 프로세스에서 커밋되면 바로 지워지고, 다른 워커의 변경은 USER_CACHE_TTL 안에 반영된다.
+    """
+    cache = _get_cache()
+    found, missing = {}, []
+    for user_id in {int(user_id) for user_id in user_ids}:
+        snapshot = cache.get(user_id)
+        if snapshot is None:
+            missing.append(user_id)
+        else:
+            found[user_id] = snapshot
+    if missing:
+        # 복제본 지연분이 캐시에 남지 않도록 항상 주 DB에서 채운다.
+        rows = db.session.execute(
+            db.select(*(getattr(User, field) for field in UserSnapshot._fields)).where(User.id.in_(missing)),
+            bind_arguments={'bind': db.engine},
+        )
+        for row in rows:
+            snapshot = found[row.id] = UserSnapshot(*row)
+            cache.set(row.id, snapshot)
+    return found
+
+
+def get(user_id):
+    """사용자 스냅샷(UserSnapshot), 없는 사용자면 None."""
+    return get_many([user_id]).get(int(user_id))
+
+
+def invalidate(user_id):
+    _get_cache().pop(int(user_id))
+
+
+def invalidate_on_commit(user_id):
+    """호출자의 트랜잭션이 커밋되면 캐시를 지운다. 커밋 전에 지우면 그 사이 조회가 옛 값을 다시 채울 수 있다."""
+    db.session.info.setdefault(_PENDING_KEY, set()).add(int(user_id))
+
+
+def _after_commit(session):
+    pending = session.info.pop(_PENDING_KEY, None)
+    if pending and has_app_context():
+        cache = _get_cache()
+        for user_id in pending:
+            cache.pop(user_id)
+
+
+def _after_rollback(session):
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _user_lookup(jwt_header, jwt_data):
+    try:
+        return get(jwt_data[current_app.config['JWT_IDENTITY_CLAIM']])
+    except (TypeError, ValueError):
+        return None
+
+
+def init_app(app, jwt):
+    """JWT의 current_user를 캐시된 UserSnapshot(프로필 필드)으로 채운다. 없는 사용자의 토큰은 401이 된다.
+
+    캐시에 있으면 DB를 읽지 않는다. 잔액(total_points)은 스냅샷에 없으므로 필요한 핸들러가 DB에서 읽는다.
+    """
+    if not event.contains(RoutingSession, 'after_commit', _after_commit):
+        event.listen(RoutingSession, 'after_commit', _after_commit)
+        event.listen(RoutingSession, 'after_rollback', _after_rollback)
+    jwt.user_lookup_loader(_user_lookup)
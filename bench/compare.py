@@ -0,0 +1,45 @@
+"""두 벤치마크 결과(JSON)의 엔드포인트별 차이를 출력한다.
+
+    python -m bench.compare before.json after.json [--threshold 10]
+"""
+import argparse
+import json
+import sys
+
+METRICS = ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('baseline')
+    parser.add_argument('candidate')
+    parser.add_argument('--threshold', type=float, default=10.0, help='회귀로 볼 p95 악화 비율(%%)')
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding='utf-8') as fp:
+        base = json.load(fp)
+    with open(args.candidate, encoding='utf-8') as fp:
+        cand = json.load(fp)
+
+    print(f"baseline {base['meta']['commit'][:10]}  candidate {cand['meta']['commit'][:10]}")
+    regressions = []
+    for name in sorted(set(base['endpoints']) | set(cand['endpoints'])):
+        b, c = base['endpoints'].get(name), cand['endpoints'].get(name)
+        if not b or not c:
+            print(f'{name}: only in {"candidate" if c else "baseline"}')
+            continue
+        parts = []
+        for metric in METRICS:
+            delta = (c[metric] - b[metric]) / b[metric] * 100 if b[metric] else 0.0
+            parts.append(f'{metric}={c[metric]} ({delta:+.1f}%)')
+        print(f'{name:40s} ' + ' '.join(parts))
+        if b['p95_ms'] and (c['p95_ms'] - b['p95_ms']) / b['p95_ms'] * 100 > args.threshold:
+            regressions.append(name)
+
+    if regressions:
+        print('p95 regressions: ' + ', '.join(regressions))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""리워드 교환 동시성 벤치마크.
+
+재고가 한정된 인기 리워드 하나에 동시 사용자 수를 늘려 가며 POST /api/rewards/<id>/redeem을 호출하고,
+동시성 단계마다 처리량과 지연, 그리고 정합성(초과 판매 없음, 재고·잔액·원장 일치, 멱등 키 재시도 미중복)을
+검사해 JSON으로 기록한다. 동시 처리량은 행 잠금이 있는 DB(Postgres)에서 의미가 있다.
+
+    python -m bench.redeem --database-uri postgresql://localhost/sleepcash_bench \\
+        --levels 1,2,4,8,16,32,64 --shards 32 --output bench/results/redeem.json
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.extensions import db
+from app.models.points import UserPointLog
+from app.models.rewards import Reward, RewardRedemption, RewardStockShard
+from app.models.user import User
+from app.services import rewards
+
+from .run import git_commit, make_config, percentile
+from .stub_providers import StubProviders
+
+COST = 100
+
+
+def _setup_level(n_users: int, stock: int, shards: int, starting_points: int) -> int:
+    """사용자(포인트 보유)와 리워드를 새로 만들고 리워드 id를 돌려준다."""
+    for model in (RewardRedemption, UserPointLog, RewardStockShard):
+        db.session.execute(db.delete(model))
+    db.session.execute(db.delete(Reward))
+    db.session.execute(db.delete(User))
+    db.session.execute(User.__table__.insert(), [
+        {'id': i, 'provider': 'kakao', 'provider_user_id': str(i), 'total_points': starting_points}
+        for i in range(1, n_users + 1)
+    ])
+    db.session.execute(UserPointLog.__table__.insert(), [
+        {'user_id': i, 'change': starting_points, 'balance_after': starting_points,
+         'type': 'bench_seed', 'created_at': datetime.utcnow()}
+        for i in range(1, n_users + 1)
+    ])
+    reward = rewards.create_reward('한정 수면 키트', COST, stock=stock, shards=shards)
+    db.session.commit()
+    return reward.id
+
+
+def _verify(reward_id: int, stock: int, n_users: int, starting_points: int, successes: int) -> dict:
+    redeemed = db.session.query(db.func.count(RewardRedemption.id)).scalar()
+    remaining = db.session.query(db.func.sum(RewardStockShard.remaining)).scalar() or 0
+    negative = db.session.query(db.func.count()).filter(RewardStockShard.remaining < 0).scalar()
+    spent = starting_points * n_users - (db.session.query(db.func.sum(User.total_points)).scalar() or 0)
+    ledger_spent = -(db.session.query(db.func.sum(UserPointLog.change)).filter(UserPointLog.type == 'reward_redeem').scalar() or 0)
+    duplicate_keys = db.session.query(db.func.count()).select_from(
+        db.session.query(RewardRedemption.user_id, RewardRedemption.idempotency_key)
+        .group_by(RewardRedemption.user_id, RewardRedemption.idempotency_key)
+        .having(db.func.count() > 1)
+        .subquery()
+    ).scalar()
+    checks = {
+        'no_oversell': redeemed <= stock,
+        'stock_conserved': redeemed + remaining == stock,
+        'no_negative_shard': negative == 0,
+        'points_match_redemptions': spent == redeemed * COST,
+        'ledger_matches_points': ledger_spent == spent,
+        'no_duplicate_keys': duplicate_keys == 0,
+        'responses_match_rows': successes == redeemed,
+    }
+    return {'redeemed': redeemed, 'remaining': remaining, 'checks': checks, 'ok': all(checks.values())}
+
+
+def run_level(app, concurrency: int, requests_per_user: int, stock: int, shards: int, retry_ratio: float, seed: int):
+    n_users = concurrency
+    starting_points = COST * requests_per_user
+    with app.app_context():
+        reward_id = _setup_level(n_users, stock, shards, starting_points)
+        tokens = {uid: create_access_token(identity=uid) for uid in range(1, n_users + 1)}
+
+    lock = threading.Lock()
+    latencies, statuses = [], {}
+    created = [0]
+
+    def worker(uid: int):
+        rng = random.Random(seed + uid)
+        client = app.test_client()
+        headers = {'Authorization': f'Bearer {tokens[uid]}'}
+        for _ in range(requests_per_user):
+            key = uuid.uuid4().hex
+            # 일부 요청은 같은 키로 재시도해 멱등 처리를 함께 검증한다.
+            attempts = 2 if rng.random() < retry_ratio else 1
+            for _ in range(attempts):
+                started = time.perf_counter()
+                resp = client.post(f'/api/rewards/{reward_id}/redeem', headers={**headers, 'Idempotency-Key': key})
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append(elapsed)
+                    statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+                    if resp.status_code == 201:
+                        created[0] += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker, uid) for uid in range(1, n_users + 1)]:
+            future.result()
+    wall = time.perf_counter() - started
+
+    with app.app_context():
+        verification = _verify(reward_id, stock, n_users, starting_points, created[0])
+    latencies.sort()
+    return {
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'throughput_rps': round(len(latencies) / wall, 2),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'statuses': {str(k): v for k, v in sorted(statuses.items())},
+        **verification,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-uri', help='기본값은 임시 디렉터리의 SQLite 파일')
+    parser.add_argument('--levels', default='1,2,4,8,16,32', help='동시 사용자 수 목록')
+    parser.add_argument('--requests-per-user', type=int, default=20)
+    parser.add_argument('--stock-ratio', type=float, default=0.8, help='재고 = 총 요청 수 x 비율 (1 미만이면 품절까지 간다)')
+    parser.add_argument('--shards', type=int, default=16)
+    parser.add_argument('--retry-ratio', type=float, default=0.1, help='같은 멱등 키로 한 번 더 보내는 요청 비율')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='bench/results/redeem.json')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='sleepcash-redeem-')
+    database_uri = args.database_uri or f'sqlite:///{os.path.join(workdir, "bench.db")}'
+    stub = StubProviders().start()
+    app = create_app(make_config(database_uri, workdir, stub))
+    with app.app_context():
+        db.create_all()
+
+    results = []
+    for concurrency in (int(level) for level in args.levels.split(',')):
+        stock = max(int(concurrency * args.requests_per_user * args.stock_ratio), 1)
+        result = run_level(app, concurrency, args.requests_per_user, stock, args.shards, args.retry_ratio, args.seed)
+        results.append(result)
+        print(f"c={concurrency:4d} n={result['requests']:6d} {result['throughput_rps']:8.1f} rps "
+              f"p95={result['p95_ms']:.1f}ms redeemed={result['redeemed']}/{stock} "
+              f"{'OK' if result['ok'] else 'FAILED ' + str(result['checks'])}")
+    app.extensions['click_log_writer'].stop()
+    stub.stop()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'database': database_uri.split('://', 1)[0],
+            'shards': args.shards,
+            'requests_per_user': args.requests_per_user,
+            'stock_ratio': args.stock_ratio,
+        },
+        'levels': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as fp:
+        json.dump(report, fp, ensure_ascii=False, indent=2)
+    print(f'wrote {args.output}')
+    if not all(result['ok'] for result in results):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+"""엔드포인트 벤치마크.
+
+create_app으로 앱을 만들고(기본: 임시 SQLite, --database-uri로 로컬 Postgres 지정 가능) 대량 데이터를
+적재한 뒤 social-login(스텁 제공자), 세션 시작/종료, 상품 목록, 상품 클릭을 동시에 호출해
+엔드포인트별 처리량과 p50/p95/p99 지연을 JSON으로 기록한다.
+
+    python -m bench.run --scale 0.01 --duration 20 --concurrency 16 --output bench/results/local.json
+    python -m bench.compare bench/results/before.json bench/results/after.json
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.config import Config
+from app.extensions import db
+
+from .seed import CATEGORIES, seed
+from .stub_providers import StubProviders
+
+
+def make_config(database_uri: str, workdir: str, stub: StubProviders):
+    class BenchConfig(Config):
+        DEBUG = False
+        TESTING = False
+        SQLALCHEMY_DATABASE_URI = database_uri
+        SQLALCHEMY_ENGINE_OPTIONS = (
+            {'connect_args': {'timeout': 30, 'check_same_thread': False}}
+            if database_uri.startswith('sqlite') else {'pool_size': 20, 'max_overflow': 20}
+        )
+        JWT_SECRET_KEY = 'bench-secret-key-bench-secret-key'
+        JWT_VERIFY_SUB = False  # 사용자 id(int)를 identity로 쓰므로 PyJWT 2.10+의 sub 문자열 검사를 끈다.
+        GOOGLE_CLIENT_ID = stub.audience
+        GOOGLE_CERTS_URL = stub.base_url + '/certs'
+        KAKAO_USER_ME_URL = stub.base_url + '/v2/user/me'
+        CLICK_LOG_SPOOL_DIR = os.path.join(workdir, 'spool')
+        AD_EVENT_SEGMENT_DIR = os.path.join(workdir, 'ad_events')
+        SLOW_QUERY_MS = None
+        INSTRUMENTATION_HEADERS = False
+        RATE_LIMIT_ENABLED = False  # 한 IP에서 몰아 보내는 부하가 한도에 막히지 않도록
+
+    return BenchConfig
+
+
+def percentile(sorted_values, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def timed(self, name: str, call, ok_statuses=(200, 201)):
+        started = time.perf_counter()
+        resp = call()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.latencies[name].append(elapsed)
+            if resp.status_code not in ok_statuses:
+                self.errors[name] += 1
+        return resp
+
+    def summary(self, wall_seconds: float) -> dict:
+        result = {}
+        for name, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            result[name] = {
+                'count': len(values),
+                'errors': self.errors[name],
+                'throughput_rps': round(len(values) / wall_seconds, 2),
+                'p50_ms': round(percentile(values, 50) * 1000, 3),
+                'p95_ms': round(percentile(values, 95) * 1000, 3),
+                'p99_ms': round(percentile(values, 99) * 1000, 3),
+                'max_ms': round(values[-1] * 1000, 3),
+            }
+        return result
+
+
+def worker(app, worker_id: int, workers: int, counts: dict, stub: StubProviders, deadline: float,
+           recorder: Recorder, seed_value: int):
+    rng = random.Random(seed_value + worker_id)
+    client = app.test_client()
+    # 같은 사용자의 세션이 워커끼리 겹치지 않도록 사용자 구간을 나눈다.
+    my_users = range(worker_id + 1, counts['users'] + 1, workers)
+    with app.app_context():
+        tokens = {uid: create_access_token(identity=uid) for uid in rng.sample(my_users, min(50, len(my_users)))}
+    user_ids = list(tokens)
+
+    scenarios = ['social_login', 'session', 'product_list', 'product_click']
+    step = 0
+    while time.perf_counter() < deadline:
+        scenario = scenarios[step % len(scenarios)]
+        step += 1
+        uid = rng.choice(user_ids)
+        auth = {'Authorization': f'Bearer {tokens[uid]}'}
+
+        if scenario == 'social_login':
+            if stub.supports_google and rng.random() < 0.5:
+                body = {'provider': 'google', 'token': stub.google_token(f'g{uid}')}
+            else:
+                body = {'provider': 'kakao', 'token': stub.kakao_token(rng.randint(1, counts['users']))}
+            recorder.timed('POST /api/auth/social-login',
+                           lambda: client.post('/api/auth/social-login', json=body))
+        elif scenario == 'session':
+            resp = recorder.timed('POST /api/sleep/sessions',
+                                  lambda: client.post('/api/sleep/sessions', json={'mood': 'good'}, headers=auth),
+                                  ok_statuses=(201, 400))
+            session_id = (resp.get_json() or {}).get('session_id')
+            if session_id:
+                recorder.timed('POST /api/sleep/sessions/<id>/end',
+                               lambda: client.post(f'/api/sleep/sessions/{session_id}/end', headers=auth))
+        elif scenario == 'product_list':
+            params = {'category': rng.choice(CATEGORIES + ('all',)), 'page': rng.randint(1, 5)}
+            recorder.timed('GET /api/shop/products',
+                           lambda: client.get('/api/shop/products', query_string=params))
+        else:
+            product_id = rng.randint(1, counts['products'])
+            recorder.timed('POST /api/shop/products/<id>/click',
+                           lambda: client.post(f'/api/shop/products/{product_id}/click', json={'source': 'bench'}),
+                           ok_statuses=(200, 410))
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-uri', help='기본값은 임시 디렉터리의 SQLite 파일')
+    parser.add_argument('--scale', type=float, default=1.0, help='데이터 규모 배율 (1.0 = 사용자 10만, 로그 수백만)')
+    parser.add_argument('--duration', type=float, default=30, help='부하 시간(초)')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default='bench/results/latest.json')
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix='sleepcash-bench-')
+    database_uri = args.database_uri or f'sqlite:///{os.path.join(workdir, "bench.db")}'
+    stub = StubProviders().start()
+    app = create_app(make_config(database_uri, workdir, stub))
+
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        counts = seed(args.scale, args.seed)
+        seed_seconds = time.perf_counter() - started
+
+    recorder = Recorder()
+    deadline = time.perf_counter() + args.duration
+    load_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        futures = [
+            pool.submit(worker, app, i, args.concurrency, counts, stub, deadline, recorder, args.seed)
+            for i in range(args.concurrency)
+        ]
+        for future in futures:
+            future.result()
+    wall = time.perf_counter() - load_started
+    app.extensions['click_log_writer'].stop()
+    stub.stop()
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'timestamp': datetime.utcnow().isoformat() + 'Z',
+            'database': database_uri.split('://', 1)[0],
+            'scale': args.scale,
+            'volumes': counts,
+            'seed_seconds': round(seed_seconds, 2),
+            'duration_seconds': round(wall, 2),
+            'concurrency': args.concurrency,
+        },
+        'endpoints': recorder.summary(wall),
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as fp:
+        json.dump(report, fp, ensure_ascii=False, indent=2)
+
+    for name, stats in report['endpoints'].items():
+        print(f"{name:40s} n={stats['count']:6d} err={stats['errors']:4d} {stats['throughput_rps']:8.1f} rps "
+              f"p50={stats['p50_ms']:.1f}ms p95={stats['p95_ms']:.1f}ms p99={stats['p99_ms']:.1f}ms")
+    print(f'wrote {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""벤치마크용 대량 데이터 적재. ORM 대신 Core 다중 행 INSERT를 쓴다."""
+import random
+from datetime import datetime, timedelta
+
+from app.extensions import db
+from app.models.points import UserPointLog
+from app.models.shop import ShopClickLog, ShopProduct
+from app.models.user import User
+
+CHUNK = 10000
+CATEGORIES = ('sleep', 'pillow', 'mask', 'aroma', 'bedding')
+BASE_VOLUMES = {
+    'users': 100_000,
+    'products': 10_000,
+    'point_logs': 2_000_000,
+    'click_logs': 2_000_000,
+}
+
+
+def volumes(scale: float) -> dict:
+    return {name: max(int(count * scale), 1) for name, count in BASE_VOLUMES.items()}
+
+
+def _insert_chunks(table, rows_iter, total: int, log):
+    chunk = []
+    done = 0
+    for row in rows_iter:
+        chunk.append(row)
+        if len(chunk) >= CHUNK:
+            db.session.execute(table.insert(), chunk)
+            db.session.commit()
+            done += len(chunk)
+            chunk = []
+            log(f'  {table.name}: {done}/{total}')
+    if chunk:
+        db.session.execute(table.insert(), chunk)
+        db.session.commit()
+
+
+def seed(scale: float = 1.0, seed_value: int = 42, log=print) -> dict:
+    """비어 있는 DB에 사용자·상품·포인트 원장·클릭 로그를 채운다. 이미 있으면 건너뛴다.
+
+    빈 테이블에 순서대로 넣으므로 사용자·상품 id는 1부터 연속이라고 가정한다.
+    """
+    counts = volumes(scale)
+    if db.session.query(User.id).first() is not None:
+        log('database already seeded, skipping')
+        return counts
+
+    rng = random.Random(seed_value)
+    now = datetime.utcnow()
+    n_users, n_products = counts['users'], counts['products']
+
+    log(f'seeding {counts}')
+    _insert_chunks(User.__table__, (
+        {
+            'provider': 'kakao', 'provider_user_id': str(i), 'email': f'{i}@bench.local',
+            'display_name': f'user{i}', 'total_points': 0, 'created_at': now - timedelta(days=rng.randint(0, 365)),
+        }
+        for i in range(1, n_users + 1)
+    ), n_users, log)
+
+    _insert_chunks(ShopProduct.__table__, (
+        {
+            'title': f'수면 상품 {i}', 'subtitle': '숙면을 위한 추천 상품',
+            'detail_description': '상세 설명 ' * 50, 'category': CATEGORIES[i % len(CATEGORIES)],
+            'tag': rng.choice(('베스트', '신상품', None)), 'price': rng.randint(5, 200) * 1000,
+            'discount_rate': rng.choice((0, 10, 20, 30)), 'rating': round(rng.uniform(3, 5), 1),
+            'review_count': rng.randint(0, 5000), 'is_recommended': rng.random() < 0.1,
+            'source': 'coupang', 'partners_url': f'https://link.coupang.com/a/{i}',
+            'created_at': now - timedelta(minutes=i), 'updated_at': now - timedelta(minutes=i),
+            'is_active': rng.random() > 0.02,
+        }
+        for i in range(1, n_products + 1)
+    ), n_products, log)
+
+    def point_logs():
+        for i in range(counts['point_logs']):
+            change = rng.randint(1, 200)
+            yield {
+                'user_id': rng.randint(1, n_users), 'change': change, 'balance_after': change,
+                'type': 'sleep_reward', 'created_at': now - timedelta(minutes=rng.randint(0, 525600)),
+            }
+    _insert_chunks(UserPointLog.__table__, point_logs(), counts['point_logs'], log)
+
+    def click_logs():
+        for i in range(counts['click_logs']):
+            product_id = rng.randint(1, n_products)
+            yield {
+                'user_id': rng.randint(1, n_users) if rng.random() < 0.7 else None,
+                'product_id': product_id, 'source': rng.choice(('home', 'shop', 'sleep_end')),
+                'user_agent': 'bench', 'out_url': f'https://link.coupang.com/a/{product_id}',
+                'created_at': now - timedelta(minutes=rng.randint(0, 525600)),
+            }
+    _insert_chunks(ShopClickLog.__table__, click_logs(), counts['click_logs'], log)
+
+    # 원장과 잔액을 맞춰 둔다.
+    ledger = db.session.query(UserPointLog.user_id, db.func.sum(UserPointLog.change)).group_by(UserPointLog.user_id)
+    db.session.execute(
+        User.__table__.update().where(User.__table__.c.id == db.bindparam('uid')).values(total_points=db.bindparam('tp')),
+        [{'uid': uid, 'tp': total} for uid, total in ledger],
+    )
+    db.session.commit()
+    return counts
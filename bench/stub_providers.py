@@ -0,0 +1,120 @@
+"""social-login 벤치마크용 로컬 구글/카카오 스텁 서버."""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubState:
+    def __init__(self):
+        self.certs = {}
+        self.signer = None
+
+
+def _make_google_signer(state: _StubState):
+    """cryptography가 있으면 자체 서명 인증서로 구글 ID 토큰을 만들 수 있게 한다."""
+    try:
+        import datetime
+        from cryptography import x509
+        from cryptography.hazmat.primitives import hashes, serialization
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        from cryptography.x509.oid import NameOID
+        from google.auth import crypt
+    except ImportError:
+        return
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'bench-stub')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(days=1))
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    state.certs = {'bench': cert.public_bytes(serialization.Encoding.PEM).decode()}
+    pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption(),
+    ).decode()
+    state.signer = crypt.RSASigner.from_string(pem, key_id='bench')
+
+
+class StubProviders:
+    """/certs(구글 인증서)와 /v2/user/me(카카오)를 흉내 내는 HTTP 서버.
+
+    카카오 토큰은 'kakao-<숫자 id>' 형식이면 유효하다.
+    """
+
+    def __init__(self, audience: str = 'bench-client'):
+        self.audience = audience
+        self.state = _StubState()
+        _make_google_signer(self.state)
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self._server.server_address[1]}'
+
+    @property
+    def supports_google(self) -> bool:
+        return self.state.signer is not None
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+
+    def google_token(self, sub: str) -> str:
+        from google.auth import jwt as google_jwt
+        now = int(time.time())
+        payload = {
+            'iss': 'https://accounts.google.com', 'aud': self.audience, 'sub': sub,
+            'iat': now, 'exp': now + 3600, 'email': f'{sub}@bench.local', 'name': sub,
+        }
+        return google_jwt.encode(self.state.signer, payload).decode()
+
+    @staticmethod
+    def kakao_token(user_id: int) -> str:
+        return f'kakao-{user_id}'
+
+    def _handler(self):
+        state = self.state
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, headers=()):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for key, value in headers:
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path.startswith('/certs'):
+                    return self._send(200, state.certs, [('Cache-Control', 'public, max-age=3600')])
+                if self.path.startswith('/v2/user/me'):
+                    token = self.headers.get('Authorization', '').rpartition(' ')[2]
+                    if not token.startswith('kakao-') or not token[6:].isdigit():
+                        return self._send(401, {'msg': 'invalid token'})
+                    uid = int(token[6:])
+                    return self._send(200, {
+                        'id': uid,
+                        'kakao_account': {'email': f'{uid}@bench.local', 'profile': {'nickname': f'user{uid}'}},
+                    })
+                return self._send(404, {})
+
+        return Handler